@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+PipFace Bench - Benchmark de Renderização Headless
+===================================================
+
+Mede o custo de renderização da face sem sessão gráfica (plataforma
+offscreen do Qt), para pegar regressões em CI antes do deploy.
+
+Para cada expressão em EXPRESSIONS:
+1. Avança N frames da animação (passo de 1/fps, com o FPS escolhido pela face)
+2. Renderiza cada frame num QImage
+3. Opcionalmente mantém um burst de partículas vivo
+
+Depois mede a latência comando -> set_state para cada transporte de socket
+("thread" e "qt") e cada família (UDP, AF_UNIX datagrama e stream): comandos
+reais enviados pelo PipFaceControl a partir de outra thread.
+
+Resultado em ms/frame (passo de animação e paint) num arquivo JSON.
+
+Uso:
+    python3 pip_face_bench.py
+    python3 pip_face_bench.py --frames 600 --burst 500 --output bench.json
+    python3 pip_face_bench.py --latency 1000 --latency-interval 2
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import tempfile
+import threading
+
+# Sem desktop: força a plataforma offscreen antes de criar o QApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt, QTimer, QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt6.QtGui import QImage
+
+from pip_face_v04 import PipFace, EXPRESSIONS, FrameStats, CONFIG, SOCKET_TRANSPORTS
+from pip_face_integration import PipFaceControl
+
+
+def summarize(samples: list) -> dict:
+    """Histograma (p50/p95/p99/max) + média, em ms."""
+    summary = FrameStats.histogram(samples)
+    if samples:
+        summary["mean"] = round(sum(samples) / len(samples), 3)
+    return summary
+
+
+def bench_expression(face: PipFace, name: str, frames: int, warmup: int,
+                     burst: int, burst_every: int) -> dict:
+    """Roda `frames` frames de uma expressão e mede passo e paint."""
+    face.set_state(name)
+    dpr = face.devicePixelRatioF()
+    image = QImage(
+        int(face.width() * dpr), int(face.height() * dpr),
+        QImage.Format.Format_ARGB32_Premultiplied
+    )
+    image.setDevicePixelRatio(dpr)
+
+    step_ms, paint_ms = [], []
+    peak_particles = 0
+
+    for frame in range(warmup + frames):
+        if burst and frame % burst_every == 0:
+            face.emit_particle("heart", burst)
+
+        image.fill(Qt.GlobalColor.transparent)
+        start = time.perf_counter()
+        face.step(face.dt)
+        stepped = time.perf_counter()
+        face.render(image)
+        painted = time.perf_counter()
+
+        if frame >= warmup:
+            step_ms.append((stepped - start) * 1000)
+            paint_ms.append((painted - stepped) * 1000)
+            peak_particles = max(peak_particles, len(face.particles))
+
+    total = [s + p for s, p in zip(step_ms, paint_ms)]
+    return {
+        "step_ms": summarize(step_ms),
+        "paint_ms": summarize(paint_ms),
+        "frame_ms": summarize(total),
+        "peak_particles": peak_particles,
+    }
+
+
+def bench_latency(app: QApplication, transport: str, family: str, count: int, interval: float) -> dict:
+    """Latência (ms) entre enviar um comando e o set_state correspondente."""
+    unix_path = None
+    if family != "udp":
+        unix_path = os.path.join(tempfile.gettempdir(), f"pipface-bench-{os.getpid()}.sock")
+    CONFIG["socket_transport"] = transport
+    CONFIG["unix_socket"] = unix_path
+    CONFIG["unix_socket_type"] = "stream" if family == "unix-stream" else "dgram"
+
+    face = PipFace()
+    face.show()
+    server = face.socket_server
+    server.ready.wait(2.0)  # Porta efêmera/caminho: esperar o bind (thread)
+
+    # Cada comando leva o instante de envio (mesmo processo: perf_counter comparável)
+    latencies = []
+    received = {}
+    handle_command = face.handle_command
+    set_state = face.set_state
+
+    def on_command(cmd: dict):
+        received.update(cmd)
+        handle_command(cmd)
+
+    def on_set_state(state_name: str, priority=None):
+        if "sent" in received:
+            latencies.append((time.perf_counter() - received.pop("sent")) * 1000)
+        set_state(state_name, priority)
+
+    face.socket_signals.command_received.disconnect()
+    face.socket_signals.command_received.connect(on_command)
+    face.set_state = on_set_state
+
+    def sender():
+        control = PipFaceControl(
+            port=server.port, unix_path=unix_path, stream=family == "unix-stream"
+        )
+        for i in range(count):
+            state = "thinking" if i % 2 else "idle"
+            control.send(state=state, sent=time.perf_counter())
+            time.sleep(interval)
+        control.sock.close()
+        time.sleep(0.1)  # Deixar os últimos chegarem
+        QTimer.singleShot(0, app.quit)
+
+    thread = threading.Thread(target=sender, daemon=True)
+    thread.start()
+    app.exec()
+    thread.join()
+
+    server.stop()
+    face.timer.stop()
+    face.tray.hide()
+    face.hide()
+
+    result = summarize(latencies)
+    result["sent"] = count
+    result["socket"] = server.stats()
+    return result
+
+
+def run(frames: int, warmup: int, burst: int, burst_every: int) -> dict:
+    """Executa o benchmark para todas as expressões."""
+    # Porta efêmera (não briga com uma face rodando) e timer sempre ativo
+    CONFIG["socket_port"] = 0
+    CONFIG["park_when_idle"] = False
+    CONFIG["frame_stats_log_interval"] = 0
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    face = PipFace()
+    face.show()  # Janela escondida roda no FPS mínimo (fps_hidden)
+    app.processEvents()
+    face.timer.stop()  # Os frames são dirigidos pelo benchmark
+
+    try:
+        results = {
+            name: bench_expression(face, name, frames, warmup, burst, burst_every)
+            for name in EXPRESSIONS
+        }
+    finally:
+        face.socket_server.stop()
+        face.tray.hide()
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": app.platformName(),
+            "machine": platform.machine(),
+            "frames": frames,
+            "warmup": warmup,
+            "burst": burst,
+            "burst_every": burst_every,
+            "window": [face.width(), face.height()],
+            "dpr": face.devicePixelRatioF(),
+        },
+        "results": results,
+        "render_cache": face.render_cache_stats(),
+        "particles_dropped": face.particles.dropped,
+    }
+    return report
+
+
+def run_latency(count: int, interval: float) -> dict:
+    """Mede a latência de comando para cada transporte e família de socket."""
+    CONFIG["socket_port"] = 0
+    app = QApplication.instance() or QApplication(sys.argv)
+    families = ["udp"]
+    if hasattr(socket, "AF_UNIX"):
+        families += ["unix-dgram", "unix-stream"]
+
+    saved = {key: CONFIG[key] for key in ("socket_transport", "unix_socket", "unix_socket_type")}
+    try:
+        return {
+            f"{transport}/{family}": bench_latency(app, transport, family, count, interval)
+            for transport in SOCKET_TRANSPORTS
+            for family in families
+        }
+    finally:
+        CONFIG.update(saved)
+
+
+def print_report(report: dict):
+    print(f"{'expressão':<12} {'passo p50':>10} {'passo p95':>10} {'paint p50':>10} {'paint p95':>10} {'partículas':>11}")
+    for name, result in report["results"].items():
+        step, paint = result["step_ms"], result["paint_ms"]
+        print(
+            f"{name:<12} {step['p50']:>10.3f} {step['p95']:>10.3f} "
+            f"{paint['p50']:>10.3f} {paint['p95']:>10.3f} {result['peak_particles']:>11}"
+        )
+
+    if "latency" in report:
+        print(f"\n{'transporte':<19} {'lat p50':>10} {'lat p95':>10} {'lat p99':>10} {'lat max':>10} {'lotes':>7}")
+        for name, result in report["latency"].items():
+            if not result["count"]:
+                print(f"{name:<19} {'sem amostras':>10}")
+                continue
+            print(
+                f"{name:<19} {result['p50']:>10.3f} {result['p95']:>10.3f} "
+                f"{result['p99']:>10.3f} {result['max']:>10.3f} {result['socket']['batches']:>7}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless de renderização do PipFace")
+    parser.add_argument("--frames", type=int, default=300, help="Frames medidos por expressão")
+    parser.add_argument("--warmup", type=int, default=30, help="Frames de aquecimento (não medidos)")
+    parser.add_argument("--burst", type=int, default=0, help="Partículas por burst (0 = sem burst)")
+    parser.add_argument("--burst-every", type=int, default=45, help="Frames entre bursts")
+    parser.add_argument("--latency", type=int, default=200,
+                        help="Comandos por transporte no teste de latência (0 = pular)")
+    parser.add_argument("--latency-interval", type=float, default=5.0, help="ms entre comandos")
+    parser.add_argument("--output", default="pip_face_bench.json", help="Arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    report = run(args.frames, args.warmup, args.burst, max(1, args.burst_every))
+    if args.latency:
+        report["latency"] = run_latency(args.latency, args.latency_interval / 1000)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_report(report)
+    print(f"\nResultado salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,23 @@ Sistema bidirecional que envia comandos E recebe confirmação.
 Permite que o Pip "veja" o que está acontecendo.
 
 Fluxo:
-1. Pip envia comando → PipFace na porta 5555
+1. Pip envia comando (com seq e "ack": true) → PipFace na porta 5555
 2. PipFace executa animação
-3. PipFace envia resposta → Pip na porta 5556
-4. Pip recebe feedback e registra
+3. PipFace confirma ("aplicado até seq N" + estado) → no mesmo socket do Pip
+4. Pip recebe a confirmação e registra
+5. A cada status, Pip consulta a face ({"query": "state"}) e registra a resposta
+6. Mudanças de estado, partículas e sono chegam por assinatura (vários
+   observadores ao mesmo tempo, cada um no seu socket)
 """
 
 import socket
-import json
 import threading
 import time
 import logging
 from datetime import datetime
 
+from pip_face_protocol import encode_command, decode_command
+
 # Setup logging com timestamp detalhado
 logging.basicConfig(
     level=logging.INFO,
@@ -36,30 +40,31 @@ class PipFaceDebug:
     
     def __init__(self):
         self.command_port = 5555
-        self.feedback_port = 5556
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)  # Comandos e confirmações
+        self.seq = 0
         self.feedback_listener = None
         self.last_state = "idle"
         self.last_animation = None
+        self.lease = 30  # Segundos; renovado no loop principal
         
-        # Iniciar listener de feedback
+        # Iniciar listener de feedback e assinar as mudanças
         self._start_feedback_listener()
+        self.subscribe()
     
     def _start_feedback_listener(self):
-        """Inicia listener para feedback do PipFace."""
+        """Inicia listener para as confirmações do PipFace."""
+        # O socket precisa de endereço antes do primeiro recvfrom
+        self.sock.bind(("127.0.0.1", 0))
+
         def listen():
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.bind(("127.0.0.1", self.feedback_port))
-            sock.settimeout(1.0)
-            
-            logger.info(f"📡 Listener de feedback iniciado na porta {self.feedback_port}")
+            logger.info(f"📡 Listener de confirmações na porta {self.sock.getsockname()[1]}")
             
             while True:
                 try:
-                    data, addr = sock.recvfrom(1024)
-                    feedback = json.loads(data.decode('utf-8'))
-                    self._process_feedback(feedback)
-                except socket.timeout:
-                    continue
+                    data, addr = self.sock.recvfrom(65536)  # Respostas de consulta passam de 1 KB
+                    feedback = decode_command(data)
+                    if feedback:
+                        self._process_feedback(feedback)
                 except Exception as e:
                     logger.debug(f"Erro no listener: {e}")
         
@@ -68,26 +73,41 @@ class PipFaceDebug:
         self.feedback_listener = thread
     
     def _process_feedback(self, feedback: dict):
-        """Processa feedback recebido do PipFace."""
-        status = feedback.get("status")
+        """Processa confirmação (ou resposta de consulta) recebida do PipFace."""
+        if "notify" in feedback:
+            changes = {k: v for k, v in feedback.items() if k != "notify"}
+            logger.info(f"🔔 MUDANÇA #{feedback['notify']}: {changes}")
+            self.last_state = feedback.get("state", self.last_state)
+            return
+        if "subscribed" in feedback:
+            logger.info(f"📡 Assinatura: {feedback['subscribed']} (lease {feedback.get('lease')}s)")
+            return
+        if feedback.get("query") == "state":
+            logger.info(
+                f"🔎 FACE: {feedback['state']} | FPS {feedback['stats']['fps']} "
+                f"(alvo {feedback['target_fps']}) | Partículas: {feedback['particles']} "
+                f"| Filas: {feedback['queue']}"
+            )
+            return
+
+        seq = feedback.get("ack")
         state = feedback.get("state")
-        timestamp = feedback.get("timestamp")
         
-        logger.info(f"✅ FEEDBACK: {status} | Estado: {state}")
+        logger.info(f"✅ FEEDBACK: aplicado até seq {seq} | Estado: {state}")
         self.last_state = state
-        self.last_animation = timestamp
+        self.last_animation = datetime.now().isoformat()
     
     def send_command(self, state: str, **kwargs) -> bool:
         """Envia comando e aguarda feedback."""
-        cmd = {"state": state, "timestamp": datetime.now().isoformat()}
+        self.seq += 1
+        cmd = {"state": state, "timestamp": datetime.now().isoformat(), "seq": self.seq, "ack": True,
+               "source": "debug"}
         cmd.update(kwargs)
         
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.sendto(json.dumps(cmd).encode(), ("127.0.0.1", self.command_port))
-            sock.close()
+            self.sock.sendto(encode_command(cmd), ("127.0.0.1", self.command_port))
             
-            logger.info(f"📤 COMANDO ENVIADO: {state}")
+            logger.info(f"📤 COMANDO ENVIADO: {state} (seq {self.seq})")
             self.last_state = state
             return True
         
@@ -95,6 +115,15 @@ class PipFaceDebug:
             logger.error(f"❌ Erro ao enviar comando: {e}")
             return False
     
+    def subscribe(self):
+        """Assina (ou renova) as notificações de mudança da face."""
+        cmd = {"subscribe": ["state", "particle", "sleep"], "lease": self.lease}
+        self.sock.sendto(encode_command(cmd), ("127.0.0.1", self.command_port))
+
+    def query_state(self):
+        """Pede o estado da face (a resposta chega no listener)."""
+        self.sock.sendto(encode_command({"query": "state"}), ("127.0.0.1", self.command_port))
+
     def log_session(self):
         """Registra estado atual da sessão."""
         logger.info("=" * 60)
@@ -102,6 +131,7 @@ class PipFaceDebug:
         logger.info("=" * 60)
         logger.info(f"Estado Atual: {self.last_state}")
         logger.info(f"Última Animação: {self.last_animation}")
+        self.query_state()
         logger.info("=" * 60)
     
     def test_sequence(self):
@@ -129,14 +159,15 @@ if __name__ == "__main__":
     debug = PipFaceDebug()
     
     logger.info("🎭 PipFace Debug System ATIVO")
-    logger.info("Recebendo feedback em tempo real na porta 5556\n")
+    logger.info("Recebendo confirmações em tempo real\n")
     
     # Testar
     debug.test_sequence()
     
-    # Manter listener ativo
+    # Manter listener ativo (renovando a assinatura antes de vencer)
     try:
         while True:
-            time.sleep(1)
+            time.sleep(debug.lease / 2)
+            debug.subscribe()
     except KeyboardInterrupt:
         logger.info("\n🛑 Debug system parado")
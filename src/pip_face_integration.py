@@ -22,48 +22,177 @@ Uso:
 """
 
 import socket
-import json
 import logging
 import asyncio
 import time
+import random
 import threading
+import weakref
+from collections import deque
 from typing import Optional, Callable
 from functools import wraps
 
+from pip_face_protocol import (
+    encode_command, decode_command, frame, unix_address, FRAME_HEADER, SUBSCRIPTION_EVENTS,
+    DEFAULT_PARTICLE_COUNT,
+)
+from pip_face_timers import get_scheduler
+
 logger = logging.getLogger(__name__)
 
 
-class PipFaceControl:
-    """Interface de controle do PipFace com sincronização automática."""
-    
-    def __init__(self, host: str = "127.0.0.1", port: int = 5555, auto_idle_timeout: int = 30):
+# Chaves que a janela de coalescência junta (o resto sai na hora, na ordem)
+COALESCE_KEYS = {"state", "emotion", "amplitude", "particle", "particles"}
+
+
+class FaceCommands:
+    """Estados, partículas e timelines em cima de `_transmit`, `_call_later` e `_schedule_idle`.
+
+    Comum ao PipFaceControl (sockets e agendador de timers) e ao AsyncPipFaceControl
+    (transporte asyncio e loop.call_later).
+    """
+
+    def _init_coalescing(self, window: float, critical_states):
+        self.coalesce_window = window
+        self.critical_states = set(critical_states)
+        self.suppressed = 0  # Envios absorvidos pela janela de coalescência
+        self._coalesced: Optional[dict] = None  # Comando juntado esperando o fim da janela
+        self._coalesce_timer = None
+        self._coalesce_lock = threading.Lock()  # flush roda na thread do agendador
+        self._seq_lock = threading.Lock()  # seq e ordem de envio (idem)
+
+    def _init_resync(self, dedup: float, heartbeat: float):
+        self.dedup = dedup
+        self.deduplicated = 0  # Envios pulados: a face já estava no estado pedido
+        self.heartbeat = heartbeat
+        self.resyncs = 0  # Reafirmações do estado pelo heartbeat
+        self._heartbeat_timer = None
+        self._last_send = time.monotonic()  # Último comando enviado (relógio do dedup/heartbeat)
+        self._quiet_until = 0.0  # Fim (monotonic) da timeline enviada: o heartbeat não a interrompe
+        self.confirmed_state: Optional[str] = None  # Estado confirmado pela face (ack/consulta)
+
+    def send(self, **kwargs) -> bool:
+        """Envia comando para PipFace (UDP ou AF_UNIX).
+
+        Com coalesce_window, estado/amplitude/partículas enviados dentro da
+        janela viram um comando só, que sai no fim dela (estado: vale o
+        último; partículas: somadas). Estados em critical_states saem na hora.
+
+        Com dedup, um estado igual ao último enviado (há menos de `dedup`
+        segundos) não sai: o heartbeat cuida de reafirmá-lo.
         """
-        Inicializa o controlador do PipFace.
-        
-        Args:
-            host: Endereço do servidor PipFace
-            port: Porta UDP
-            auto_idle_timeout: Segundos para retornar a idle após atividade
+        if self.dedup > 0 and self._redundant(kwargs):
+            self.deduplicated += 1
+            return True
+        if self.coalesce_window > 0 and kwargs.keys() <= COALESCE_KEYS:
+            return self._coalesce(kwargs)
+        if self._coalesced is not None:
+            self.flush()  # O que está na janela sai antes (mantém a ordem)
+        return self._send_now(kwargs)
+
+    def flush(self) -> bool:
+        """Envia já o comando juntado na janela de coalescência (se houver)."""
+        with self._coalesce_lock:
+            pending, self._coalesced = self._coalesced, None
+            if self._coalesce_timer is not None:
+                self._coalesce_timer.cancel()
+                self._coalesce_timer = None
+            if pending is None:
+                return True
+            # Uma partícula só: mantém o layout binário de {"particle": ...}
+            particles = pending.get("particles")
+            if particles and list(particles.values()) == [DEFAULT_PARTICLE_COUNT]:
+                pending["particle"] = next(iter(pending.pop("particles")))
+            return self._send_now(pending)
+
+    def _coalesce(self, cmd: dict) -> bool:
+        with self._coalesce_lock:
+            first = self._coalesced is None
+            pending = {} if first else self._coalesced
+            if not first:
+                self.suppressed += 1
+            for key, value in cmd.items():
+                if key in ("particle", "particles"):
+                    counts = {value: DEFAULT_PARTICLE_COUNT} if key == "particle" else value
+                    particles = pending.setdefault("particles", {})
+                    for kind, count in counts.items():
+                        particles[kind] = particles.get(kind, 0) + count
+                else:
+                    pending["state" if key == "emotion" else key] = value
+            self._coalesced = pending
+            self.last_state = pending.get("state", self.last_state)
+            critical = pending.get("state") in self.critical_states
+            if first and not critical:
+                self._coalesce_timer = self._call_later(self.coalesce_window, self.flush)
+        if critical:
+            return self.flush()
+        return True
+
+    def _redundant(self, cmd: dict) -> bool:
+        """O comando só repete o estado em cache (e a face não confirmou outro)."""
+        if len(cmd) != 1 or time.monotonic() - self._last_send >= self.dedup:
+            return False
+        state = cmd.get("state", cmd.get("emotion"))
+        return state == self.last_state and self.acked_state in (None, state)
+
+    def _beat(self):
+        """Heartbeat: confere o estado da face e só o reafirma se divergiu.
+
+        Cobre datagramas perdidos e a face reiniciada (que volta em idle). A
+        confirmação vem do ack do último envio ou da resposta à sondagem
+        ({"query": "state"}, que não acorda a face) do período anterior; sem
+        caminho de volta (AsyncPipFaceControl) reafirma sempre, o que na face
+        é no-op se ela já está no estado.
         """
-        self.host = host
-        self.port = port
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.auto_idle_timeout = auto_idle_timeout
-        self.last_state = "idle"
-        self.last_activity = time.time()
-        self._auto_idle_task = None
-        self._idle_timer = None
-        
-        logger.info(f"PipFaceControl inicializado (porta {port})")
-    
-    def send(self, **kwargs) -> bool:
-        """Envia comando para PipFace via UDP."""
+        self._heartbeat_timer = None
+        quiet = time.monotonic() - max(self._last_send, self._quiet_until)
+        if quiet < self.heartbeat or self._coalesced is not None:
+            delay = self.heartbeat - quiet
+        else:
+            delay = self.heartbeat
+            # idle é o estado inicial da face, e dele ela dorme sozinha: nada a reafirmar
+            if self.last_state != "idle":
+                if not self._confirmed():
+                    self.resyncs += 1
+                    self._send_now({"state": self.last_state})
+                self._probe()
+        if self._heartbeat_timer is None:
+            try:
+                self._heartbeat_timer = self._call_later(max(delay, 0.01), self._beat)
+            except RuntimeError:
+                pass  # Loop asyncio encerrado: recomeça no próximo envio
+
+    def _confirmed(self) -> bool:
+        """A face confirmou o estado desejado? (sem caminho de volta: nunca)"""
+        return False
+
+    def _probe(self):
+        """Pergunta o estado à face para o próximo heartbeat (sem caminho de volta: nada)."""
+
+    def _send_now(self, kwargs: dict) -> bool:
         try:
-            cmd = json.dumps(kwargs)
-            self.sock.sendto(cmd.encode("utf-8"), (self.host, self.port))
+            if self.source is not None and ("state" in kwargs or "emotion" in kwargs):
+                kwargs = {**kwargs, "source": self.source}
+            state = kwargs.get("state", kwargs.get("emotion"))
+            reliable = self.reliable and state in self.critical_states
+            with self._seq_lock:  # Envios do agendador (flush/heartbeat) e do chamador
+                if self.acks or reliable:
+                    self.seq += 1
+                    kwargs = {**kwargs, "seq": self.seq, "ack": True}
+                data = encode_command(kwargs, self.binary)
+                self._transmit(data)
+                if reliable:
+                    self._track_delivery(kwargs["seq"], data)
+                elif state is not None or "timeline" in kwargs:
+                    self._unacked = None  # Estado mais novo: não reenviar o antigo por cima
+            if state is not None:
+                self.confirmed_state = None  # Estado novo: ainda sem confirmação da face
             self.last_state = kwargs.get("state", self.last_state)
             self.last_activity = time.time()
-            logger.debug(f"PipFace: {cmd}")
+            self._last_send = time.monotonic()
+            logger.debug(f"PipFace: {kwargs}")
+            if self.heartbeat > 0 and self._heartbeat_timer is None:
+                self._heartbeat_timer = self._call_later(self.heartbeat, self._beat)
             return True
         except Exception as e:
             logger.warning(f"Erro ao enviar comando PipFace: {e}")
@@ -113,13 +242,341 @@ class PipFaceControl:
     def particle(self, particle_type: str):
         """Emitir partícula."""
         self.send(particle=particle_type)
+
+    def timeline(self, keyframes: list, mode: str = "replace") -> bool:
+        """
+        Envia uma sequência de keyframes que a própria face agenda.
+
+        Um pacote só, com timing no relógio da face e sem thread no cliente:
+            face.timeline([
+                {"state": "speaking", "amplitude": 0.4, "duration": 3},
+                {"state": "happy", "particle": "heart", "duration": 2},
+                {"state": "idle"},
+            ])
+
+        Args:
+            keyframes: Lista de {state, amplitude, particle, duration, easing, transition}
+            mode: "replace" (cancela a timeline atual), "queue" ou "if_idle"
+        """
+        # A timeline decide quando voltar ao idle
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+        ok = self.send(timeline=keyframes, mode=mode)
+        states = [k["state"] for k in keyframes if "state" in k]
+        if ok and states:
+            self.last_state = states[-1]
+            self._quiet_until = time.monotonic() + sum(k.get("duration", 0) for k in keyframes)
+        return ok
+
+
+    def stream_amplitude(self, samples: list, rate: int = 100, timestamp: Optional[float] = None) -> bool:
+        """
+        Envia amostras de amplitude (0-1) para o lip-sync, fora da fila de comandos.
+
+        A face toca as amostras com um pequeno atraso fixo (jitter buffer),
+        interpolando no instante de cada frame. Mandar em pedaços pequenos
+        (ex.: 2 amostras a cada 20ms a 100 Hz) e com a face em "speaking".
+
+        Args:
+            samples: Amplitudes em ordem, uma a cada 1/rate segundos
+            rate: Amostras por segundo
+            timestamp: Instante (time.monotonic) da primeira amostra;
+                       padrão: a última amostra é agora
+        """
+        if not samples:
+            return True
+        if timestamp is None:
+            timestamp = time.monotonic() - (len(samples) - 1) / rate
+        try:
+            for start in range(0, len(samples), 255):  # Máximo por pacote binário
+                chunk = [float(v) for v in samples[start:start + 255]]
+                cmd = {"amplitude_samples": chunk, "t": timestamp + start / rate, "rate": rate}
+                self._transmit(encode_command(cmd, self.binary))
+            return True
+        except Exception as e:
+            logger.warning(f"Erro ao enviar amplitude PipFace: {e}")
+            return False
+
+    def reset(self):
+        """Resetar ao estado idle."""
+        self.idle()
+
+
+class PipFaceControl(FaceCommands):
+    """Interface de controle do PipFace com sincronização automática."""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 5555, auto_idle_timeout: int = 30,
+                 binary: bool = True, unix_path: Optional[str] = None, stream: bool = False,
+                 acks: bool = False, source: Optional[str] = None,
+                 coalesce_window: float = 0.0, critical_states: tuple = ("speaking",),
+                 dedup: float = 0.0, heartbeat: float = 0.0,
+                 reliable: bool = False, retries: int = 4, retry_timeout: float = 0.05):
+        """
+        Inicializa o controlador do PipFace.
+        
+        Args:
+            host: Endereço do servidor PipFace
+            port: Porta UDP
+            auto_idle_timeout: Segundos para retornar a idle após atividade
+            binary: Usar o formato binário compacto quando o comando couber
+            unix_path: Socket AF_UNIX da face ("@nome" = abstrato); None = UDP
+            stream: AF_UNIX stream (conexão persistente) em vez de datagrama
+            acks: Pedir confirmação (seq) de cada comando - ver wait_ack()
+            source: Nome da fonte na arbitragem da face (prioridade/dwell)
+            coalesce_window: Segundos (ex: 0.016-0.033, um frame) em que envios de
+                             estado/partículas se juntam num só; 0 = envia cada um
+            critical_states: Estados que furam a janela (saem na hora); só valem
+                             estados de EXPRESSIONS da face
+            dedup: Segundos em que o estado em cache vale para pular envios
+                   repetidos do mesmo estado; 0 = envia sempre
+            heartbeat: Período (s) da reafirmação do estado desejado (converge
+                       depois de perdas ou de a face reiniciar); 0 = sem heartbeat
+            reliable: Estados em critical_states vão com seq e são reenviados
+                      até a face confirmar (o resto segue sem confirmação)
+            retries: Reenvios no máximo por comando confiável
+            retry_timeout: Espera (s) pela primeira confirmação; dobra a cada reenvio
+        """
+        self.host = host
+        self.port = port
+        self.binary = binary
+        self.unix_path = unix_path
+        self.stream = stream and unix_path is not None
+        self.sock: Optional[socket.socket] = None
+        if unix_path is None:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        elif not self.stream:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sock.bind("")  # Autobind (Linux): endereço para receber confirmações/respostas
+        self.acks = acks
+        self.source = source
+        # Seq inicial aleatório: a face não confunde este cliente com um anterior no mesmo endereço
+        self.seq = random.randrange(1 << 30)  # Último seq enviado
+        self.acked_seq = self.seq  # Maior seq confirmado pela face
+        # No stream a entrega já é garantida pela conexão
+        self.reliable = reliable and not self.stream
+        self.retries = retries
+        self.retry_timeout = retry_timeout
+        self.retransmits = 0  # Reenvios de comandos confiáveis
+        self.undelivered = 0  # Comandos confiáveis sem confirmação depois de todos os reenvios
+        self._unacked: Optional[tuple] = None  # (seq, dados) do comando confiável pendente
+        self._recv_lock = threading.Lock()  # poll_acks e reenvios (thread do agendador)
+        self.acked_state: Optional[str] = None  # Estado da face na última confirmação
+        self._ack_buffer = bytearray()
+        self._answers: dict = {}  # Respostas de consultas ainda não lidas, por tipo
+        self.notifications: deque = deque(maxlen=256)  # Notificações da assinatura (delta)
+        self.auto_idle_timeout = auto_idle_timeout
+        self.last_state = "idle"
+        self.last_activity = time.time()
+        self._auto_idle_task = None
+        self._idle_timer = None
+        self._init_coalescing(coalesce_window, critical_states)
+        self._init_resync(dedup, heartbeat)
+        
+        logger.info(f"PipFaceControl inicializado ({unix_path or f'porta {port}'})")
     
     # =========================================================================
     # Utilidades
     # =========================================================================
+
+    def query(self, what: str = "state", timeout: float = 1.0) -> Optional[dict]:
+        """
+        Consulta a face e espera a resposta (None se não vier a tempo).
+
+        Args:
+            what: "state" (estado, FaceState atual/alvo, FPS, partículas, filas),
+                  "stats" (frame/paint, socket, confirmações) ou "config"
+            timeout: Segundos esperando a resposta
+        """
+        return self._request(what, timeout, query=what)
+
+    def resync(self, timeout: float = 0.5) -> bool:
+        """
+        Confere o estado real da face (consulta) e reafirma o desejado se divergiu.
+
+        Versão síncrona do heartbeat, para quando dá para esperar a resposta
+        (ex.: ao conectar, ou depois de um erro). Sem resposta, reafirma às cegas.
+        """
+        answer = self.query("state", timeout)
+        if answer is not None and answer.get("state") == self.last_state:
+            return True
+        self.resyncs += 1
+        return self._send_now({"state": self.last_state})
+
+    def _request(self, answer: str, timeout: float, **cmd) -> Optional[dict]:
+        """Envia `cmd` e espera a resposta `answer` (None se não vier a tempo)."""
+        self._answers.pop(answer, None)
+        if not self.send(**cmd):
+            return None
+        deadline = time.monotonic() + timeout
+        while answer not in self._answers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.poll_acks(remaining)
+        return self._answers.pop(answer)
+
+    def subscribe(self, events: tuple = SUBSCRIPTION_EVENTS, lease: float = 30.0,
+                  timeout: float = 1.0) -> Optional[dict]:
+        """
+        Assina notificações de mudança da face (renovar antes da lease vencer).
+
+        As notificações (só o que mudou, {"notify": n, ...}) chegam em
+        `notifications` a cada poll_acks().
+
+        Args:
+            events: Entre "state", "particle" e "sleep"
+            lease: Segundos até a assinatura vencer sem renovação
+
+        Returns:
+            O estado atual (base dos deltas), ou None se a face não respondeu
+        """
+        return self._request("subscribed", timeout, subscribe=list(events), lease=lease)
+
+    def unsubscribe(self, timeout: float = 1.0) -> bool:
+        """Cancela a assinatura."""
+        return self._request("subscribed", timeout, unsubscribe=True) is not None
+
+    def poll_acks(self, timeout: float = 0.0) -> int:
+        """Lê confirmações, respostas e notificações (espera até `timeout` pela primeira).
+
+        Retorna o maior seq já aplicado pela face.
+        """
+        with self._recv_lock:
+            self._read_replies(timeout)
+        return self.acked_seq
+
+    def _read_replies(self, timeout: float):
+        if self.sock is None:
+            return
+        try:
+            self.sock.settimeout(timeout)
+            while True:
+                data = self.sock.recv(65536)
+                if self.stream:
+                    if not data:
+                        break
+                    self._on_stream_data(data)
+                else:
+                    self._on_reply(data)
+                self.sock.settimeout(0)
+        except (BlockingIOError, socket.timeout):
+            pass
+        except OSError as e:
+            logger.debug(f"Erro lendo confirmações: {e}")
+        finally:
+            if self.sock is not None:
+                self.sock.settimeout(None)
+
+    def _poll_nowait(self):
+        """Lê as respostas pendentes (thread do agendador) sem esperar."""
+        # Quem estiver em poll_acks já lê as respostas; não disputar o socket
+        if self._recv_lock.acquire(blocking=False):
+            try:
+                self._read_replies(0)
+            finally:
+                self._recv_lock.release()
+
+    def _confirmed(self) -> bool:
+        self._poll_nowait()
+        return self.confirmed_state == self.last_state
+
+    def _probe(self):
+        self.confirmed_state = None  # Vale só a resposta a esta sondagem
+        try:
+            self._transmit(encode_command({"query": "state"}, self.binary))
+        except Exception as e:
+            logger.debug(f"Erro na sondagem do heartbeat: {e}")
+
+    def _track_delivery(self, seq: int, data: bytes):
+        self._unacked = (seq, data)
+        self._call_later(self.retry_timeout, lambda: self._retransmit(seq, 1))
+
+    def _retransmit(self, seq: int, attempt: int):
+        """Sem confirmação a tempo: reenvia com backoff exponencial, até `retries` vezes."""
+        self._poll_nowait()
+        if self.acked_seq >= seq or self._unacked is None or self._unacked[0] != seq:
+            return  # Confirmado (ou substituído por um comando mais novo)
+        if attempt > self.retries:
+            self._unacked = None
+            self.undelivered += 1
+            logger.warning(f"PipFace não confirmou o comando {seq} depois de {self.retries} reenvios")
+            return
+        try:
+            self._transmit(self._unacked[1])
+            self.retransmits += 1
+        except Exception as e:
+            logger.debug(f"Erro ao reenviar comando PipFace: {e}")
+        delay = self.retry_timeout * 2 ** attempt
+        self._call_later(delay, lambda: self._retransmit(seq, attempt + 1))
+
+    def wait_ack(self, seq: Optional[int] = None, timeout: float = 1.0) -> bool:
+        """Espera a face confirmar até `seq` (padrão: o último comando enviado)."""
+        seq = self.seq if seq is None else seq
+        deadline = time.monotonic() + timeout
+        while self.acked_seq < seq:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.poll_acks(remaining)
+        return True
+
+    def _on_stream_data(self, data: bytes):
+        buffer = self._ack_buffer
+        buffer += data
+        header = FRAME_HEADER.size
+        while len(buffer) >= header:
+            (size,) = FRAME_HEADER.unpack_from(buffer)
+            if len(buffer) < header + size:
+                break
+            self._on_reply(bytes(buffer[header:header + size]))
+            del buffer[:header + size]
+
+    def _on_reply(self, data: bytes):
+        msg = decode_command(data)
+        if msg and "notify" in msg:
+            self.notifications.append(msg)
+        elif msg and "subscribed" in msg:
+            self._answers["subscribed"] = msg
+        elif msg and "query" in msg:
+            self._answers[msg["query"]] = msg
+            if msg["query"] == "state":
+                self.confirmed_state = msg.get("state")
+        elif msg and isinstance(msg.get("ack"), int) and msg["ack"] > self.acked_seq:
+            self.acked_seq = msg["ack"]
+            self.acked_state = msg.get("state")
+            if self.acked_seq == self.seq:
+                self.confirmed_state = self.acked_state
+
+    def _call_later(self, delay: float, callback: Callable):
+        return get_scheduler().call_later(delay, callback)
+
+    def _transmit(self, data: bytes):
+        if self.unix_path is None:
+            self.sock.sendto(data, (self.host, self.port))
+        elif self.stream:
+            self._send_stream(data)
+        else:
+            self.sock.sendto(data, unix_address(self.unix_path))
+
+    def _send_stream(self, data: bytes):
+        """Envia um frame pela conexão AF_UNIX stream (reconecta uma vez se caiu)."""
+        for attempt in range(2):
+            if self.sock is None:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.sock.connect(unix_address(self.unix_path))
+            try:
+                self.sock.sendall(frame(data))
+                return
+            except OSError:
+                self.sock.close()
+                self.sock = None
+                if attempt:
+                    raise
     
     def _schedule_idle(self, delay: int):
-        """Agenda retorno a idle após delay (usa threading, não async)."""
+        """Agenda retorno a idle após delay (agendador compartilhado, não async)."""
         # Cancelar timer anterior se existir
         if self._idle_timer is not None:
             self._idle_timer.cancel()
@@ -132,29 +589,163 @@ class PipFaceControl:
             else:
                 logger.debug("⏰ Já estava em idle, nada a fazer")
         
-        # Criar thread de timer - NÃO usar time.sleep aqui!
-        self._idle_timer = threading.Timer(delay, return_to_idle)
-        self._idle_timer.daemon = True
-        self._idle_timer.start()
+        # Uma thread para todos os timers (pip_face_timers) - NÃO usar time.sleep aqui!
+        self._idle_timer = get_scheduler().call_later(delay, return_to_idle)
         logger.debug(f"⏰ Timer agendado para {delay}s")
-    
-    def reset(self):
-        """Resetar ao estado idle."""
-        self.idle()
+
+
+# =========================================================================
+# Cliente asyncio
+# =========================================================================
+
+class _SharedDatagram(asyncio.DatagramProtocol):
+    """Transporte asyncio de um destino, dividido por todos os clientes do loop."""
+
+    def __init__(self):
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.pending: list = []  # Datagramas enviados antes do transporte abrir
+        self.closed = False
+        self.opening: Optional[asyncio.Task] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        for data in self.pending:
+            transport.sendto(data)
+        self.pending.clear()
+
+    def send(self, data: bytes):
+        if self.transport is None:
+            self.pending.append(data)
+        else:
+            self.transport.sendto(data)
+
+    def error_received(self, exc):
+        logger.debug(f"PipFace (asyncio): {exc}")  # Ex.: face fora do ar (ICMP)
+
+    def connection_lost(self, exc):
+        self.closed = True
+
+
+# Loop -> {destino: _SharedDatagram}
+_shared_datagrams: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _shared_datagram(loop: asyncio.AbstractEventLoop, family: int, address) -> _SharedDatagram:
+    """O transporte do destino neste loop (abre na primeira vez, sem bloquear)."""
+    endpoints = _shared_datagrams.setdefault(loop, {})
+    protocol = endpoints.get(address)
+    if protocol is not None and not protocol.closed:
+        return protocol
+
+    protocol = _SharedDatagram()
+    endpoints[address] = protocol
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+
+    async def open_endpoint():
+        try:
+            sock.connect(address)  # Datagrama: só fixa o destino, não espera nada
+            await loop.create_datagram_endpoint(lambda: protocol, sock=sock)
+        except OSError as e:
+            logger.warning(f"Erro ao abrir transporte PipFace: {e}")
+            sock.close()
+            protocol.closed = True
+            protocol.pending.clear()
+
+    protocol.opening = loop.create_task(open_endpoint())
+    return protocol
+
+
+class AsyncPipFaceControl(FaceCommands):
+    """
+    Controle do PipFace para código asyncio: nunca bloqueia o loop nem cria threads.
+
+    Mesma interface de estados do PipFaceControl. Os datagramas saem por um
+    transporte asyncio (DatagramProtocol) compartilhado por todos os clientes
+    do mesmo loop e destino, e a volta ao idle é agendada com loop.call_later.
+    Os métodos continuam síncronos (enviar um datagrama não espera nada), mas
+    precisam ser chamados de dentro do event loop.
+
+    Sem confirmações/consultas/assinaturas nem AF_UNIX stream: para isso,
+    PipFaceControl.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 5555, binary: bool = True,
+                 unix_path: Optional[str] = None, source: Optional[str] = None,
+                 coalesce_window: float = 0.0, critical_states: tuple = ("speaking",),
+                 dedup: float = 0.0, heartbeat: float = 0.0):
+        """
+        Args:
+            host: Endereço do servidor PipFace
+            port: Porta UDP
+            binary: Usar o formato binário compacto quando o comando couber
+            unix_path: Socket AF_UNIX (datagrama) da face; None = UDP
+            source: Nome da fonte na arbitragem da face (prioridade/dwell)
+            coalesce_window: Janela (s) de coalescência dos envios, como no PipFaceControl
+            critical_states: Estados que furam a janela
+            dedup, heartbeat: Dedup pelo estado em cache e reafirmação periódica,
+                              como no PipFaceControl
+        """
+        if unix_path is None:
+            self.family, self.address = socket.AF_INET, (host, port)
+        else:
+            self.family, self.address = socket.AF_UNIX, unix_address(unix_path)
+        self.binary = binary
+        self.source = source
+        self.acks = False
+        self.reliable = False  # Sem caminho de volta para confirmações (ver PipFaceControl)
+        self.acked_state: Optional[str] = None
+        self.last_state = "idle"
+        self.last_activity = time.time()
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+        self._init_coalescing(coalesce_window, critical_states)
+        self._init_resync(dedup, heartbeat)
+
+    def _call_later(self, delay: float, callback: Callable):
+        return asyncio.get_running_loop().call_later(delay, callback)
+
+    def _transmit(self, data: bytes):
+        loop = asyncio.get_running_loop()  # RuntimeError fora do loop (send registra)
+        _shared_datagram(loop, self.family, self.address).send(data)
+
+    def _schedule_idle(self, delay: int):
+        """Agenda retorno a idle após delay (loop.call_later, sem threads)."""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+
+        def return_to_idle():
+            self._idle_timer = None
+            if self.last_state != "idle":
+                logger.info(f"⏰ Retornando ao idle (era {self.last_state})...")
+                self.idle()
+
+        try:
+            self._idle_timer = asyncio.get_running_loop().call_later(delay, return_to_idle)
+        except RuntimeError:
+            self._idle_timer = None  # Fora do loop: o send já registrou o erro
 
 
 # Instância global
 _face_instance = None
+_async_face_instance = None
 
 
 def get_face() -> PipFaceControl:
     """Retorna a instância global."""
     global _face_instance
     if _face_instance is None:
-        _face_instance = PipFaceControl()
+        _face_instance = PipFaceControl(source="bot")
     return _face_instance
 
 
+def get_async_face() -> AsyncPipFaceControl:
+    """Retorna a instância global para código asyncio (um transporte por loop)."""
+    global _async_face_instance
+    if _async_face_instance is None:
+        _async_face_instance = AsyncPipFaceControl(source="bot")
+    return _async_face_instance
+
+
 # =========================================================================
 # Sistema de Hooks - Automação
 # =========================================================================
@@ -162,7 +753,7 @@ def get_face() -> PipFaceControl:
 class PipFaceHooks:
     """Sistema de callbacks para automação do avatar."""
     
-    def __init__(self, face: PipFaceControl):
+    def __init__(self, face: FaceCommands):
         self.face = face
         self.message_handlers = []
         self.response_handlers = []
@@ -228,7 +819,7 @@ def get_hooks() -> PipFaceHooks:
     """Retorna sistema de hooks."""
     global _hooks_instance
     if _hooks_instance is None:
-        _hooks_instance = PipFaceHooks(get_face())
+        _hooks_instance = PipFaceHooks(get_async_face())  # Os triggers rodam no loop
     return _hooks_instance
 
 
@@ -240,7 +831,7 @@ def setup_hooks():
     @hooks.on_response_start()
     async def auto_idle_after_response():
         await asyncio.sleep(2)
-        get_face().idle()
+        get_async_face().idle()
     
     logger.info("PipFace hooks configurados")
 
@@ -253,7 +844,7 @@ def track_thinking(func: Callable) -> Callable:
     """Decorator: mostra thinking enquanto executa."""
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        face = get_face()
+        face = get_async_face()
         face.thinking()
         try:
             result = await func(*args, **kwargs) if asyncio.iscoroutinefunction(func) else func(*args, **kwargs)
@@ -268,7 +859,7 @@ def track_working(func: Callable) -> Callable:
     """Decorator: mostra working enquanto executa."""
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        face = get_face()
+        face = get_async_face()
         face.working()
         try:
             result = await func(*args, **kwargs) if asyncio.iscoroutinefunction(func) else func(*args, **kwargs)
@@ -284,14 +875,15 @@ def track_working(func: Callable) -> Callable:
 # Teste
 # =========================================================================
 
-def process_message_with_emoji(message: str) -> None:
+def process_message_with_emoji(message: str, face: Optional[FaceCommands] = None) -> None:
     """
     Processa mensagem e sincroniza face com emojis.
     
-    Deve ser chamado ANTES de enviar qualquer resposta.
+    Deve ser chamado ANTES de enviar qualquer resposta. Em código asyncio,
+    passar face=get_async_face().
     """
     from pip_message_hook import process_message
-    process_message(message)
+    process_message(message, face)
 
 
 if __name__ == "__main__":
@@ -11,13 +11,14 @@ Pip Face Monitor v7 - Thinking + Speaking 3s
 
 import subprocess
 import socket
-import json
 import time
-import threading
 import logging
 from datetime import datetime
 from pathlib import Path
 
+from pip_face_protocol import encode_command, send_unix
+from pip_face_timers import get_scheduler
+
 # Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +31,9 @@ log = logging.getLogger(__name__)
 SLEEP_TIMEOUT = 300
 SPEAKING_DURATION = 3
 PIPFACE_PORT = 5555
+PIPFACE_SOCKET = None  # Caminho AF_UNIX da face (ex: "@pipface"); None = UDP
+PIPFACE_SOCKET_STREAM = False  # AF_UNIX stream em vez de datagrama
+PIPFACE_SOURCE = "monitor"  # Fonte na arbitragem da face (source_priorities)
 LOG_DIR = Path("/tmp/clawdbot")
 
 
@@ -40,8 +44,12 @@ def get_today_log() -> Path:
 
 def send_state(state: str):
     try:
+        data = encode_command({"state": state, "source": PIPFACE_SOURCE})
+        if PIPFACE_SOCKET:
+            send_unix(data, PIPFACE_SOCKET, PIPFACE_SOCKET_STREAM)
+            return
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.sendto(json.dumps({"state": state}).encode(), ("127.0.0.1", PIPFACE_PORT))
+        sock.sendto(data, ("127.0.0.1", PIPFACE_PORT))
         sock.close()
     except Exception as e:
         log.error(f"Erro: {e}")
@@ -73,8 +81,7 @@ class Monitor:
         def go_idle():
             self.set_state("idle")
         
-        self.speaking_timer = threading.Timer(SPEAKING_DURATION, go_idle)
-        self.speaking_timer.start()
+        self.speaking_timer = get_scheduler().call_later(SPEAKING_DURATION, go_idle)
     
     def check_sleep(self):
         if self.state == "idle" and self.idle_start:
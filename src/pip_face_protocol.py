@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+PipFace Protocol - Formato Binário dos Comandos
+================================================
+
+Os comandos da face (porta 5555) podem ir como JSON ou num formato binário
+compacto, versionado, com layout fixo para os comandos comuns. O receptor
+detecta o formato pelo primeiro byte: datagramas binários começam com
+MAGIC (0xB1, que nunca inicia texto UTF-8), o resto é JSON.
+
+Layout (big-endian), depois do cabeçalho [MAGIC, VERSÃO, TIPO]:
+    MSG_STATE            [estado:u8]
+    MSG_AMPLITUDE        [amplitude:f32]
+    MSG_STATE_AMPLITUDE  [estado:u8][amplitude:f32]
+    MSG_PARTICLE         [partícula:u8][quantidade:u8]
+    MSG_ACK              [seq:u32][estado:u8]   (face -> cliente)
+    MSG_AMPLITUDE_SAMPLES [t:f64][taxa:u16][n:u8][amostra:u8 x n]
+
+MSG_AMPLITUDE_SAMPLES é o stream de amplitude (lip-sync): `n` amostras
+0-255 a `taxa` Hz, a primeira no instante `t` do relógio do remetente
+(qualquer relógio monotônico: a face só usa as diferenças).
+
+Estados e partículas viram índices em STATES/PARTICLES (só acrescentar no
+fim: a posição é o id no fio). Comandos que não cabem num layout fixo
+(estado desconhecido, chaves extras) continuam indo como JSON.
+
+No transporte AF_UNIX stream cada comando vai num frame [tamanho:u32][dados];
+endereços começando com "@" ficam no namespace abstrato (Linux).
+
+Uso:
+    from pip_face_protocol import encode_command, decode_command
+
+    data = encode_command({"state": "speaking", "amplitude": 0.4})
+    cmd = decode_command(data)  # {"state": "speaking", "amplitude": 0.4...}
+
+    python3 pip_face_protocol.py  # Benchmark de encode/parse (JSON x binário)
+"""
+
+import json
+import socket
+import struct
+import timeit
+from typing import Optional
+
+MAGIC = 0xB1
+VERSION = 1
+
+MSG_STATE = 1
+MSG_AMPLITUDE = 2
+MSG_STATE_AMPLITUDE = 3
+MSG_PARTICLE = 4
+MSG_ACK = 5
+MSG_AMPLITUDE_SAMPLES = 6
+
+# Ids no fio: só acrescentar no fim
+STATES = (
+    "idle", "sleeping", "speaking", "thinking", "surprised",
+    "confused", "happy", "error", "working",
+)
+PARTICLES = (
+    "heart", "question", "exclaim", "dots", "star",
+    "sweat", "zzz", "gear", "bubble",
+)
+_MAGIC_BYTE = bytes([MAGIC])
+
+STATE_IDS = {name: i for i, name in enumerate(STATES)}
+PARTICLE_IDS = {name: i for i, name in enumerate(PARTICLES)}
+
+DEFAULT_PARTICLE_COUNT = 3  # Mesmo padrão de PipFace.emit_particle
+
+# Eventos de {"subscribe": [...]} (pub/sub de mudanças da face)
+SUBSCRIPTION_EVENTS = ("state", "particle", "sleep")
+
+HEADER = struct.Struct("!BBB")
+_STATE = struct.Struct("!BBBB")
+_AMPLITUDE = struct.Struct("!BBBf")
+_STATE_AMPLITUDE = struct.Struct("!BBBBf")
+_PARTICLE = struct.Struct("!BBBBB")
+_ACK = struct.Struct("!BBBIB")
+_SAMPLES = struct.Struct("!BBBdHB")  # + n bytes de amostras
+
+FRAME_HEADER = struct.Struct("!I")  # Tamanho do frame no AF_UNIX stream
+
+
+# =============================================================================
+# ENCODE
+# =============================================================================
+def encode_binary(cmd: dict) -> Optional[bytes]:
+    """Codifica `cmd` num layout fixo; None se ele não couber em nenhum."""
+    keys = cmd.keys()
+    state = cmd.get("state")
+
+    if keys == {"state"}:
+        if state in STATE_IDS:
+            return _STATE.pack(MAGIC, VERSION, MSG_STATE, STATE_IDS[state])
+    elif keys == {"amplitude"}:
+        return _AMPLITUDE.pack(MAGIC, VERSION, MSG_AMPLITUDE, float(cmd["amplitude"]))
+    elif keys == {"state", "amplitude"}:
+        if state in STATE_IDS:
+            return _STATE_AMPLITUDE.pack(
+                MAGIC, VERSION, MSG_STATE_AMPLITUDE, STATE_IDS[state], float(cmd["amplitude"])
+            )
+    elif keys == {"ack", "state"}:
+        if state in STATE_IDS and 0 <= cmd["ack"] < 2 ** 32:
+            return _ACK.pack(MAGIC, VERSION, MSG_ACK, cmd["ack"], STATE_IDS[state])
+    elif keys == {"amplitude_samples", "t", "rate"}:
+        samples = cmd["amplitude_samples"]
+        rate = int(cmd["rate"])
+        if len(samples) <= 255 and 0 < rate < 2 ** 16:
+            quantized = bytes(min(255, max(0, int(round(v * 255)))) for v in samples)
+            return _SAMPLES.pack(
+                MAGIC, VERSION, MSG_AMPLITUDE_SAMPLES, float(cmd["t"]), rate, len(samples)
+            ) + quantized
+    elif keys == {"particle"}:
+        particle = cmd["particle"]
+        if particle in PARTICLE_IDS:
+            return _PARTICLE.pack(
+                MAGIC, VERSION, MSG_PARTICLE, PARTICLE_IDS[particle], DEFAULT_PARTICLE_COUNT
+            )
+    return None
+
+
+def encode_command(cmd: dict, binary: bool = True) -> bytes:
+    """Serializa um comando: binário quando possível (e pedido), senão JSON."""
+    if binary:
+        data = encode_binary(cmd)
+        if data is not None:
+            return data
+    return json.dumps(cmd).encode("utf-8")
+
+
+# =============================================================================
+# DECODE
+# =============================================================================
+def _decode_binary(data: bytes) -> Optional[dict]:
+    if len(data) < HEADER.size or data[1] != VERSION:
+        return None
+    kind = data[2]
+    try:
+        if kind == MSG_STATE:
+            return {"state": STATES[_STATE.unpack(data)[3]]}
+        if kind == MSG_AMPLITUDE:
+            return {"amplitude": _AMPLITUDE.unpack(data)[3]}
+        if kind == MSG_STATE_AMPLITUDE:
+            _, _, _, state, amplitude = _STATE_AMPLITUDE.unpack(data)
+            return {"state": STATES[state], "amplitude": amplitude}
+        if kind == MSG_PARTICLE:
+            _, _, _, particle, count = _PARTICLE.unpack(data)
+            return {"particles": {PARTICLES[particle]: count}}
+        if kind == MSG_AMPLITUDE_SAMPLES:
+            _, _, _, t, rate, count = _SAMPLES.unpack_from(data)
+            samples = data[_SAMPLES.size:_SAMPLES.size + count]
+            if len(samples) != count:
+                return None
+            return {"amplitude_samples": [v / 255 for v in samples], "t": t, "rate": rate}
+        if kind == MSG_ACK:
+            _, _, _, seq, state = _ACK.unpack(data)
+            return {"ack": seq, "state": STATES[state]}
+    except (struct.error, IndexError):
+        pass
+    return None
+
+
+def decode_command(data: bytes) -> Optional[dict]:
+    """Decodifica um datagrama (binário ou JSON); None se for inválido."""
+    if data[:1] == _MAGIC_BYTE:
+        return _decode_binary(data)
+    try:
+        cmd = json.loads(data.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return cmd if isinstance(cmd, dict) else None
+
+
+# =============================================================================
+# AF_UNIX
+# =============================================================================
+def unix_address(path: str):
+    """Endereço AF_UNIX: "@nome" vira namespace abstrato, o resto é arquivo."""
+    if path.startswith("@"):
+        return "\0" + path[1:]
+    return path
+
+
+def frame(data: bytes) -> bytes:
+    """Prefixa o tamanho (framing do AF_UNIX stream)."""
+    return FRAME_HEADER.pack(len(data)) + data
+
+
+def send_unix(data: bytes, path: str, stream: bool = False):
+    """Envio avulso por AF_UNIX (abre, manda e fecha)."""
+    kind = socket.SOCK_STREAM if stream else socket.SOCK_DGRAM
+    with socket.socket(socket.AF_UNIX, kind) as sock:
+        if stream:
+            sock.connect(unix_address(path))
+            sock.sendall(frame(data))
+        else:
+            sock.sendto(data, unix_address(path))
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+BENCH_COMMANDS = {
+    "state": {"state": "thinking"},
+    "amplitude": {"amplitude": 0.42},
+    "state+amplitude": {"state": "speaking", "amplitude": 0.42},
+    "particle": {"particle": "heart"},
+    "amplitude x2": {"amplitude_samples": [0.25, 0.5], "t": 12.5, "rate": 100},
+}
+
+
+def bench(number: int = 200_000) -> dict:
+    """ns/op de encode e parse para JSON e binário, por comando."""
+    results = {}
+    for name, cmd in BENCH_COMMANDS.items():
+        json_data = encode_command(cmd, binary=False)
+        binary_data = encode_command(cmd)
+        row = {"json_bytes": len(json_data), "binary_bytes": len(binary_data)}
+        for label, func in (
+            ("json_encode", lambda: encode_command(cmd, binary=False)),
+            ("binary_encode", lambda: encode_command(cmd)),
+            ("json_parse", lambda: decode_command(json_data)),
+            ("binary_parse", lambda: decode_command(binary_data)),
+        ):
+            seconds = min(timeit.repeat(func, number=number, repeat=3))
+            row[label] = round(seconds / number * 1e9, 1)
+        results[name] = row
+    return results
+
+
+def main():
+    print(f"{'comando':<16} {'bytes':>9} {'encode ns':>17} {'parse ns':>17}")
+    print(f"{'':<16} {'json/bin':>9} {'json/bin':>17} {'json/bin':>17}")
+    for name, row in bench().items():
+        print(
+            f"{name:<16} {row['json_bytes']:>4}/{row['binary_bytes']:<4} "
+            f"{row['json_encode']:>8}/{row['binary_encode']:<8} "
+            f"{row['json_parse']:>8}/{row['binary_parse']:<8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+PipFace Timers - Agendador Único para Transições Atrasadas
+===========================================================
+
+Toda transição atrasada dos clientes (volta ao idle depois de thinking,
+speaking, happy, error; o speaking de 3s do monitor) passa por uma thread
+só, em vez de uma threading.Timer (uma thread nova) por chamada.
+
+Os timers ficam num heap por prazo: agendar e reagendar custam O(log n),
+cancelar é O(1) (a entrada cancelada é descartada quando chega ao topo, e o
+heap é compactado se as canceladas passarem da metade).
+
+Uso:
+    from pip_face_timers import get_scheduler
+
+    timer = get_scheduler().call_later(2.0, face.idle)
+    timer.cancel()                 # Mesma interface da threading.Timer
+    timer = timer.reschedule(3.0)  # Cancela e agenda de novo
+    get_scheduler().stats()        # {"pending": ..., "fired": ..., "cancelled": ...}
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledTimer:
+    """Um callback agendado (devolvido por TimerScheduler.call_later)."""
+
+    __slots__ = ("scheduler", "when", "callback", "args", "cancelled", "fired")
+
+    def __init__(self, scheduler: "TimerScheduler", when: float, callback: Callable, args: tuple):
+        self.scheduler = scheduler
+        self.when = when  # time.monotonic() do disparo
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.fired = False
+
+    def cancel(self):
+        """Cancela (sem efeito se já disparou ou já foi cancelado)."""
+        self.scheduler.cancel(self)
+
+    def reschedule(self, delay: float) -> "ScheduledTimer":
+        """Cancela e agenda o mesmo callback para daqui a `delay` segundos."""
+        return self.scheduler.reschedule(self, delay)
+
+    @property
+    def pending(self) -> bool:
+        return not (self.cancelled or self.fired)
+
+
+class TimerScheduler:
+    """Heap de timers servido por uma única thread (daemon, criada sob demanda)."""
+
+    def __init__(self):
+        self.heap: list = []  # (prazo, ordem, ScheduledTimer)
+        self.order = itertools.count()  # Desempate: mesmo prazo dispara na ordem de agendamento
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        self.pending = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.stale = 0  # Entradas canceladas ainda no heap
+
+    def call_later(self, delay: float, callback: Callable, *args) -> ScheduledTimer:
+        """Agenda `callback(*args)` para daqui a `delay` segundos."""
+        timer = ScheduledTimer(self, time.monotonic() + max(0.0, delay), callback, args)
+        with self.condition:
+            heapq.heappush(self.heap, (timer.when, next(self.order), timer))
+            self.pending += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="pipface-timers", daemon=True)
+                self.thread.start()
+            elif self.heap[0][2] is timer:
+                self.condition.notify()  # Prazo novo mais cedo: acordar a thread
+        return timer
+
+    def cancel(self, timer: ScheduledTimer):
+        with self.condition:
+            if not timer.pending:
+                return
+            timer.cancelled = True
+            self.pending -= 1
+            self.cancelled += 1
+            self.stale += 1
+            if self.stale > len(self.heap) // 2:
+                self.heap = [entry for entry in self.heap if entry[2].pending]
+                heapq.heapify(self.heap)
+                self.stale = 0
+
+    def reschedule(self, timer: ScheduledTimer, delay: float) -> ScheduledTimer:
+        self.cancel(timer)
+        return self.call_later(delay, timer.callback, *timer.args)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    # Canceladas no topo saem sem disparar
+                    while self.heap and not self.heap[0][2].pending:
+                        heapq.heappop(self.heap)
+                        self.stale -= 1
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    wait = self.heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self.condition.wait(wait)
+                _, _, timer = heapq.heappop(self.heap)
+                timer.fired = True
+                self.pending -= 1
+                self.fired += 1
+
+            # Fora do lock: o callback pode agendar/cancelar outros timers
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                logger.warning(f"Erro em timer agendado: {e}")
+
+    def stats(self) -> dict:
+        with self.condition:
+            return {"pending": self.pending, "fired": self.fired, "cancelled": self.cancelled}
+
+
+_scheduler: Optional[TimerScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> TimerScheduler:
+    """O agendador do processo (uma thread para todos os clientes)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TimerScheduler()
+        return _scheduler
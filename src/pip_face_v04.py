@@ -3,7 +3,7 @@
 PIP FACE v2.1 - Face Animada para Moltbot
 ==========================================
 Features:
-- Controle externo via socket (porta 5555)
+- Controle externo via socket (UDP 5555 ou AF_UNIX), numa thread ou no event loop do Qt
 - Interpolação suave entre estados
 - Olhos quadrados estilo Minecraft com pupilas
 - Sobrancelhas expressivas
@@ -13,15 +13,33 @@ Features:
 - System tray com menu
 - Drag para mover janela
 - Persistência de posição da janela
-- FPS adaptativo (20 idle/sleeping, 30 ativo)
+- FPS adaptativo pelo movimento (10-60, 2 com a janela escondida)
+- Repintura parcial: só as regiões que mudaram (tecla D mostra as regiões)
+- Timer estacionado quando a face convergiu (acorda só para piscar/flutuar/dormir)
+- Modo baixo consumo (low_power_loops): idle/sleeping tocados de loops pré-renderizados
 - Micro-saccades quando mouse longe
 - Estados: idle, sleeping, speaking, thinking, surprised, confused, happy, error, working
 
-Comandos via socket (JSON):
+Comandos via socket (JSON, ou binário compacto - ver pip_face_protocol.py):
     {"state": "idle"}
     {"state": "speaking", "amplitude": 0.5}
     {"emotion": "happy"}
     {"particle": "heart"}
+    {"particles": {"heart": 6}}  # Quantidade por tipo (é assim que lotes chegam)
+    {"amplitude_samples": [0.1, 0.4], "t": 12.5, "rate": 100}  # Stream de lip-sync (jitter buffer)
+    {"stats": true}  # Estatísticas de frame/paint na porta de feedback (5556)
+    {"state": "error", "source": "bot"}  # Fonte: prioridade na arbitragem (source_priorities)
+    {"state": "idle", "seq": 7, "ack": true}  # Confirmação opt-in (acks em lote, ao remetente)
+                                              # Retransmissão (seq já visto): só confirma de novo
+    {"query": "state"}  # Resposta ao remetente: "state", "stats" ou "config"
+    {"subscribe": ["state", "particle", "sleep"], "lease": 30}  # Notificações (delta)
+    {"unsubscribe": true}
+    {"timeline": [  # Sequência agendada pela própria face (um pacote só)
+        {"state": "thinking", "duration": 1.5},
+        {"state": "speaking", "amplitude": 0.5, "duration": 3, "easing": "ease_out"},
+        {"state": "happy", "particle": "heart", "duration": 2},
+        {"state": "idle"}
+    ], "mode": "replace"}  # replace (padrão) | queue | if_idle
 """
 
 import sys
@@ -29,20 +47,34 @@ import os
 import math
 import random
 import json
+import select
 import socket
+import stat
+import struct
 import threading
 import platform
+import tempfile
 import time
-from dataclasses import dataclass, field
+from collections import OrderedDict, deque
 from typing import Optional
+import numpy as np
+
+from pip_face_protocol import (
+    encode_command, decode_command, unix_address, send_unix, frame, FRAME_HEADER,
+    SUBSCRIPTION_EVENTS,
+)
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QSystemTrayIcon, QMenu
 )
-from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF, pyqtSignal, QObject, QSettings
+from PyQt6.QtCore import (
+    Qt, QTimer, QPoint, QPointF, QRect, QRectF, QSizeF, pyqtSignal, QObject, QSettings, QEvent,
+    QSocketNotifier
+)
 from PyQt6.QtGui import (
-    QPainter, QColor, QPainterPath, QFont, QPen,
-    QIcon, QPixmap, QCursor, QAction, QFontDatabase
+    QPainter, QColor, QPainterPath, QFont, QPen, QImage,
+    QIcon, QPixmap, QCursor, QAction, QFontDatabase, QFontMetricsF, QRegion
 )
+from PyQt6 import sip
 
 # =============================================================================
 # CONFIGURAÇÃO
@@ -53,6 +85,14 @@ CONFIG = {
     "window_height": 300,
     "fps_active": 30,  # FPS para estados ativos
     "fps_idle": 20,  # FPS para idle/sleeping
+    "fps_adaptive": True,  # FPS pelo movimento medido (False = por estado, acima)
+    "fps_min": 10,  # Piso do FPS adaptativo
+    "fps_max": 60,  # Teto do FPS adaptativo
+    "fps_step": 5,  # O FPS anda em degraus (menos trocas de timer)
+    "fps_hold": 0.5,  # Segundos pedindo menos antes de baixar o FPS (histerese)
+    "fps_hidden": 2,  # FPS com a janela escondida, minimizada ou coberta
+    "fps_px_per_frame": 1.0,  # Movimento máximo desejado entre frames (px)
+    "fps_motion_px": 60,  # Pixels na tela de uma mudança "cheia" de um campo da face
     "face_color": (255, 145, 145),
     "face_color_error": (255, 100, 100),
     "face_color_working": (255, 160, 130),
@@ -61,11 +101,86 @@ CONFIG = {
     "blush_color": (255, 100, 100, 80),
     "brow_color": (60, 40, 40),
     "saccade_distance": 400,  # Distância do mouse pra ativar micro-saccades
+    "particle_capacity": 4096,  # Partículas vivas no máximo (pool pré-alocado)
+    "particle_burst_max": 64,  # Partículas por tipo num comando (ou lote) no máximo
+    "particle_custom_kinds": 16,  # Tipos fora de ParticleSystem.SYMBOLS no atlas (LRU)
+    "particle_text_max": 4,  # Caracteres desenhados de um tipo fora de SYMBOLS
+    "particle_size_step": 2,  # Tamanhos de fonte no atlas de partículas (buckets)
+    "render_cache_size": 96,  # Máximo de camadas de sobrancelha em cache (LRU)
+    "render_cache_face_size": 8,  # Camadas de fundo são grandes (janela inteira)
+    "brow_y_step": 1 / 40,  # Quantização do offset das sobrancelhas (0.5px)
+    "brow_angle_step": 0.5,  # Quantização do ângulo das sobrancelhas (graus)
+    "park_when_idle": True,  # Para o timer quando a face convergiu (zero CPU parado); cede a low_power_loops
+    "park_epsilon": 0.002,  # Diferença máxima atual/alvo para considerar convergido
+    "debug_dirty_regions": False,  # Desenha as regiões repintadas (tecla D alterna)
+    "max_frame_dt": 0.25,  # Passo máximo da animação após travada longa (s)
+    "frame_stats_window": 600,  # Frames nas janelas móveis de estatística
+    "frame_stats_log_interval": 0,  # Segundos entre logs de estatística (0 = nunca; ex.: 60 ao investigar)
+    "feedback_port": 5556,  # Estatísticas ({"stats": true})
+    "ack_interval": 0.05,  # Intervalo mínimo (s) entre confirmações para o mesmo lote
+    "sequence_clients": 256,  # Clientes lembrados pelo filtro de retransmissões (LRU)
+    "subscription_interval": 0.1,  # Intervalo mínimo (s) entre notificações por assinante
+    "subscription_lease": 30,  # Lease padrão (s) de uma assinatura sem "lease"
+    "subscription_lease_max": 300,  # Lease máxima aceita (s)
+    "subscription_max": 32,  # Assinantes simultâneos no máximo
+    "socket_batch_max": 256,  # Máximo de comandos juntados num lote
+    "amplitude_buffer_size": 512,  # Amostras guardadas do stream de amplitude (ring)
+    "amplitude_jitter": 0.06,  # Atraso de reprodução (s) que absorve o jitter de chegada
+    "amplitude_stream_timeout": 0.25,  # Sem amostras por esse tempo: volta ao "amplitude" dos comandos
+    "arbitration": True,  # Prioridade por fonte, dwell mínimo e supressão de no-ops
+    "source_priorities": {"local": 100, "bot": 60, "debug": 50, "monitor": 30},  # "source" -> prioridade
+    "source_priority_default": 50,  # Comandos sem "source" (ou fonte desconhecida)
+    "state_dwell": {"speaking": 0.5, "thinking": 0.3},  # Tempo mínimo (s) na tela (estados de EXPRESSIONS)
+    "timeline_max_keyframes": 64,  # Keyframes aceitos por timeline
+    "timeline_transition": 0.3,  # Duração padrão (s) da transição com easing
+    "socket_transport": "thread",  # "thread" ou "qt" (QSocketNotifier na thread da GUI)
+    "unix_socket": None,  # Caminho AF_UNIX p/ comandos ("@nome" = abstrato); None = UDP
+    "unix_socket_type": "dgram",  # "dgram" ou "stream"
+    "unix_allowed_uids": (),  # UIDs aceitos além do próprio usuário
+    "unix_max_payload": 65536,  # Tamanho máximo de um comando no AF_UNIX
+    "udp_max_payload": 65507,  # Tamanho máximo de um comando UDP (o maior datagrama IPv4)
+    "low_power_loops": False,  # Toca loops pré-renderizados em idle/sleeping (vence park_when_idle)
+    "loop_cache_dir": None,  # Diretório p/ loops em disco (np.memmap); None = memória
+    "loop_cache_max_mb": 96,  # Orçamento de pixels por loop (limita o FPS do loop)
+    "loop_cache_min_fps": 8,  # Abaixo disso o loop não vale a pena: fica ao vivo
+    "loop_cache_loops": 4,  # Loops guardados (LRU)
+    "loop_bake_frames_per_tick": 6,  # Quadros renderizados por tick durante o bake
 }
 
 # Estados que usam FPS baixo
 LOW_FPS_STATES = {"idle", "sleeping"}
 
+# Flutuação por estado: (velocidade em rad/s, amplitude em px)
+FLOAT_CYCLES = {
+    "idle": (0.8, 4),
+    "sleeping": (0.4, 12),
+    "speaking": (2.4, 6),
+    "working": (0.9, 3),  # Bem sutil
+}
+DEFAULT_FLOAT_CYCLE = (1.2, 4)
+
+# Estados com movimento contínuo (boca/pupilas) - nunca param o timer
+CONTINUOUS_STATES = {"speaking", "working"}
+
+# Estados em que as pupilas seguem o mouse
+MOUSE_FOLLOW_STATES = {"idle", "speaking"}
+
+# Curvas de transição dos keyframes (progresso 0-1 -> 0-1). Sem easing, a
+# transição é a aproximação exponencial de sempre.
+EASINGS = {
+    "linear": lambda p: p,
+    "ease_in": lambda p: p * p,
+    "ease_out": lambda p: 1 - (1 - p) * (1 - p),
+    "ease_in_out": lambda p: p * p * (3 - 2 * p),
+    "step": lambda p: 1.0,
+}
+
+# Políticas de preempção de timelines (ver PipFace.start_timeline)
+TIMELINE_MODES = {"replace", "queue", "if_idle"}
+
+# Estados que não piscam
+NO_BLINK_STATES = {"sleeping", "happy", "error"}
+
 # Estados que emitem partículas automaticamente
 # (tipo, cooldown em segundos, quantidade)
 PARTICLE_STATES = {
@@ -82,11 +197,6 @@ def lerp(a: float, b: float, t: float) -> float:
     return a + (b - a) * min(max(t, 0), 1)
 
 
-def lerp_color(c1: tuple, c2: tuple, t: float) -> tuple:
-    """Interpolação de cor."""
-    return tuple(int(lerp(c1[i], c2[i], t)) for i in range(len(c1)))
-
-
 def get_emoji_font() -> str:
     """Retorna fonte de emoji apropriada pro sistema."""
     system = platform.system()
@@ -104,34 +214,95 @@ def get_emoji_font() -> str:
         return "Noto Color Emoji"  # Fallback padrão
 
 
+def new_layer(width: float, height: float, dpr: float) -> QPixmap:
+    """Cria um QPixmap transparente para uma camada (respeitando HiDPI)."""
+    pixmap = QPixmap(max(1, math.ceil(width * dpr)), max(1, math.ceil(height * dpr)))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.GlobalColor.transparent)
+    return pixmap
+
+
 # =============================================================================
 # PARTÍCULAS
 # =============================================================================
-@dataclass
-class Particle:
-    x: float
-    y: float
-    vx: float
-    vy: float
-    life: float
-    max_life: float
-    symbol: str
-    size: float
-    color: tuple = (255, 100, 150)
-
-    def update(self, dt: float) -> bool:
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.vy -= 50 * dt  # Gravidade invertida (sobe)
-        self.life -= dt
-        return self.life > 0
-
-    @property
-    def alpha(self) -> int:
-        return int(255 * (self.life / self.max_life))
+# Vida máxima de uma partícula (segundos) - alpha cai de 255 a 0 nesse tempo
+PARTICLE_MAX_LIFE = 2.5
+
+
+class GlyphAtlas:
+    """Atlas com os símbolos de partícula pré-rasterizados.
+
+    Cada (tipo, tamanho) vira uma célula de um único QPixmap, rasterizada
+    uma vez só; desenhar as partículas é um drawPixmapFragments com a
+    opacidade de cada uma.
+    """
+
+    PAD = 2
+
+    def __init__(self, font_family: str, step: int = CONFIG["particle_size_step"]):
+        self.font_family = font_family
+        self.step = step
+        self.pixmap: Optional[QPixmap] = None
+        self.dpr = 1.0
+        self.kinds: list[tuple] = []
+        self.buckets: set[int] = set()
+        # (tipo, bucket) -> (retângulo no atlas em px do device, centro relativo à baseline)
+        self.cells: dict = {}
+
+    def bucket_sizes(self, sizes: np.ndarray) -> np.ndarray:
+        """Arredonda tamanhos de fonte para o bucket do atlas."""
+        return np.maximum(sizes.astype(np.int32) // self.step * self.step, self.step)
+
+    def ensure(self, kinds: list[tuple], buckets: set[int], dpr: float):
+        """Re-rasteriza se mudou algum tipo (novo ou reaproveitado), tamanho ou o DPR da tela."""
+        if (self.pixmap is not None and kinds == self.kinds
+                and buckets <= self.buckets and dpr == self.dpr):
+            return
+        self.kinds = list(kinds)
+        self.buckets |= buckets
+        self.dpr = dpr
+        self._build()
+
+    def _build(self):
+        pad = self.PAD
+        fonts = {size: QFont(self.font_family, size) for size in sorted(self.buckets)}
+
+        # Colunas = tamanhos, linhas = tipos
+        columns = {}
+        x = 0.0
+        row_h = 0.0
+        for size, font in fonts.items():
+            metrics = QFontMetricsF(font)
+            width = max(metrics.horizontalAdvance(text) for text, _ in self.kinds) + 2 * pad
+            columns[size] = (x, width, metrics.ascent())
+            row_h = max(row_h, metrics.height() + 2 * pad)
+            x += math.ceil(width)
+
+        self.pixmap = new_layer(x, row_h * len(self.kinds), self.dpr)
+        self.cells = {}
+        painter = QPainter(self.pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        for kind, (text, color) in enumerate(self.kinds):
+            top = kind * row_h
+            painter.setPen(QColor(*color))
+            for size, (left, width, ascent) in columns.items():
+                painter.setFont(fonts[size])
+                painter.drawText(QPointF(left + pad, top + pad + ascent), text)
+                source = QRectF(left * self.dpr, top * self.dpr, width * self.dpr, row_h * self.dpr)
+                center = QPointF(width / 2 - pad, row_h / 2 - pad - ascent)
+                self.cells[(kind, size)] = (source, center)
+        painter.end()
 
 
 class ParticleSystem:
+    """Pool de partículas em arrays NumPy (struct-of-arrays).
+
+    Os arrays são pré-alocados com capacidade fixa; slots livres ficam numa
+    pilha e são reaproveitados. O update é vetorizado sobre o pool inteiro,
+    então o custo por frame não depende de quantas partículas estão vivas.
+    """
+
     SYMBOLS = {
         "heart": "♥",
         "question": "?",
@@ -144,88 +315,476 @@ class ParticleSystem:
         "bubble": "○",  # Bolinha de pensamento
     }
 
-    def __init__(self):
-        self.particles: list[Particle] = []
+    COLORS = {
+        "heart": (255, 100, 150),
+        "question": (100, 150, 255),
+        "exclaim": (255, 200, 50),
+        "star": (255, 230, 100),
+        "sweat": (100, 200, 255),
+        "zzz": (150, 150, 200),
+        "dots": (60, 60, 60),
+        "gear": (150, 150, 150),
+        "bubble": (100, 100, 120),  # Cinza azulado para bolhinhas
+    }
+    DEFAULT_COLOR = (200, 200, 200)
+
+    def __init__(self, capacity: int = CONFIG["particle_capacity"]):
+        self.capacity = capacity
         self.emoji_font = get_emoji_font()
+        self.rng = np.random.default_rng()
+
+        # Um slot por partícula do pool
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.int16)  # Índice em self.kinds
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self.free = list(range(capacity - 1, -1, -1))  # Pilha de slots livres
+        self.count = 0
+        self.dropped = 0  # Partículas descartadas por falta de capacidade
+        self.updates = 0  # Passos com partículas vivas (muda quando elas se mexem)
+
+        # Tipos já usados: (símbolo desenhado, cor)
+        self.kinds: list[tuple] = []
+        self.kind_chars = np.zeros(0, dtype=np.float32)  # len() do símbolo por tipo
+        self._kind_index: OrderedDict = OrderedDict()  # Nome -> índice (tipos livres em ordem LRU)
+
+        self.atlas = GlyphAtlas(self.emoji_font)
+
+    def kind_of(self, symbol: str) -> Optional[int]:
+        """Índice do tipo de partícula (registra tipos novos na primeira vez).
+
+        Os tipos de SYMBOLS ficam para sempre. Nomes livres (chegam da rede)
+        ocupam no máximo particle_custom_kinds tipos, com o texto cortado em
+        particle_text_max caracteres; o menos usado sem partículas vivas é
+        reaproveitado. None se todos os tipos livres estão em uso.
+        """
+        index = self._kind_index.get(symbol)
+        if index is not None:
+            if symbol not in self.SYMBOLS:
+                self._kind_index.move_to_end(symbol)
+            return index
+
+        text = self.SYMBOLS.get(symbol, symbol[:CONFIG["particle_text_max"]])
+        kind = (text, self.COLORS.get(symbol, self.DEFAULT_COLOR))
+        custom = [name for name in self._kind_index if name not in self.SYMBOLS]
+        if symbol in self.SYMBOLS or len(custom) < CONFIG["particle_custom_kinds"]:
+            index = len(self.kinds)
+            self.kinds.append(kind)
+            self.kind_chars = np.append(self.kind_chars, np.float32(len(text)))
+        else:
+            in_use = set(np.unique(self.kind[self.alive]).tolist())
+            victim = next((name for name in custom if self._kind_index[name] not in in_use), None)
+            if victim is None:
+                return None
+            index = self._kind_index.pop(victim)
+            self.kinds[index] = kind
+            self.kind_chars[index] = len(text)
+        self._kind_index[symbol] = index
+        return index
 
     def emit(self, x: float, y: float, symbol: str, count: int = 1):
-        sym = self.SYMBOLS.get(symbol, symbol)
-        colors = {
-            "heart": (255, 100, 150),
-            "question": (100, 150, 255),
-            "exclaim": (255, 200, 50),
-            "star": (255, 230, 100),
-            "sweat": (100, 200, 255),
-            "zzz": (150, 150, 200),
-            "dots": (60, 60, 60),
-            "gear": (150, 150, 150),
-            "bubble": (100, 100, 120),  # Cinza azulado para bolhinhas
-        }
-        color = colors.get(symbol, (200, 200, 200))
-
-        for _ in range(count):
-            # Bolhas sobem (vy negativo), outras partículas comportamento padrão
-            if symbol == "bubble":
-                vy = random.uniform(-80, -40)  # Negativo = sobe
-                vx = random.uniform(-15, 15)   # Menos movimento lateral
-                size = random.uniform(12, 24)
-            else:
-                vy = random.uniform(40, 80)
-                vx = random.uniform(-30, 30)
-                size = random.uniform(16, 28)
-            
-            self.particles.append(Particle(
-                x=x + random.uniform(-30, 30),
-                y=y,
-                vx=vx,
-                vy=vy,
-                life=random.uniform(1.5, 2.5),
-                max_life=2.5,
-                symbol=sym,
-                size=size,
-                color=color,
-            ))
+        # Nome e quantidade chegam da rede: tipo errado é descartado, não derruba a face
+        if not isinstance(symbol, str):
+            return
+        try:
+            count = int(count)
+        except (TypeError, ValueError, OverflowError):
+            return
+        n = min(count, len(self.free))
+        self.dropped += count - n
+        if n <= 0:
+            return
+        kind = self.kind_of(symbol)
+        if kind is None:
+            self.dropped += n
+            return
+
+        slots = np.array(self.free[-n:], dtype=np.intp)
+        del self.free[-n:]
+
+        rng = self.rng
+        # Bolhas sobem (vy negativo), outras partículas comportamento padrão
+        if symbol == "bubble":
+            vy = rng.uniform(-80, -40, n)  # Negativo = sobe
+            vx = rng.uniform(-15, 15, n)   # Menos movimento lateral
+            size = rng.uniform(12, 24, n)
+        else:
+            vy = rng.uniform(40, 80, n)
+            vx = rng.uniform(-30, 30, n)
+            size = rng.uniform(16, 28, n)
+
+        self.x[slots] = x + rng.uniform(-30, 30, n)
+        self.y[slots] = y
+        self.vx[slots] = vx
+        self.vy[slots] = vy
+        self.life[slots] = rng.uniform(1.5, 2.5, n)
+        self.size[slots] = size
+        self.kind[slots] = kind
+        self.alive[slots] = True
+        self.count += n
 
     def update(self, dt: float):
-        self.particles = [p for p in self.particles if p.update(dt)]
+        if not self.count:
+            return
+
+        self.updates += 1
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.vy -= 50 * dt  # Gravidade invertida (sobe)
+        self.life -= dt
+
+        dead = np.flatnonzero(self.alive & (self.life <= 0))
+        if len(dead):
+            self.alive[dead] = False
+            self.free.extend(dead.tolist())
+            self.count -= len(dead)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def max_speed(self) -> float:
+        """Maior velocidade (px/s) entre as partículas vivas."""
+        if not self.count:
+            return 0.0
+        alive = self.alive
+        return float(np.max(np.hypot(self.vx[alive], self.vy[alive])))
+
+    def bounds(self) -> QRect:
+        """Retângulo que cobre todas as partículas vivas (vazio se não houver)."""
+        if not self.count:
+            return QRect()
+        alive = self.alive
+        x, y, size = self.x[alive], self.y[alive], self.size[alive]
+        right = x + size * 1.6 * self.kind_chars[self.kind[alive]]
+        left, top = int(x.min()) - 2, int((y - size * 2).min())
+        return QRect(
+            left, top,
+            int(right.max()) + 4 - left, int((y + size * 0.6).max()) + 1 - top
+        )
 
     def draw(self, painter: QPainter):
-        for p in self.particles:
-            painter.setFont(QFont(self.emoji_font, int(p.size)))
-            color = QColor(*p.color, p.alpha)
-            painter.setPen(color)
-            painter.drawText(int(p.x), int(p.y), p.symbol)
+        """Desenha todas as partículas numa chamada só, a partir do atlas."""
+        if not self.count:
+            return
+        alive = np.flatnonzero(self.alive)
+        kinds = self.kind[alive].tolist()
+        buckets = self.atlas.bucket_sizes(self.size[alive])
+        dpr = painter.device().devicePixelRatioF()
+        self.atlas.ensure(self.kinds, set(np.unique(buckets).tolist()), dpr)
+
+        cells = self.atlas.cells
+        scale = 1.0 / dpr
+        opacity = np.clip(self.life[alive] / PARTICLE_MAX_LIFE, 0.0, 1.0).tolist()
+        xs = self.x[alive].astype(np.int32).tolist()
+        ys = self.y[alive].astype(np.int32).tolist()
+        fragments = []
+        for kind, size, x, y, alpha in zip(kinds, buckets.tolist(), xs, ys, opacity):
+            source, center = cells[(kind, size)]
+            fragments.append(QPainter.PixmapFragment.create(
+                QPointF(x, y) + center, source, scale, scale, 0, alpha
+            ))
+        painter.drawPixmapFragments(fragments, self.atlas.pixmap)
+
+
+# =============================================================================
+# CACHE DE RENDERIZAÇÃO
+# =============================================================================
+class RenderCache:
+    """Cache LRU de camadas pré-renderizadas (QPixmap) com contadores."""
+
+    def __init__(self, capacity: int = CONFIG["render_cache_size"]):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key, render):
+        """Retorna a camada de `key`, renderizando com `render()` se faltar."""
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+        self.misses += 1
+        item = render()
+        self._items[key] = item
+        if len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+        return item
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Sobrancelha: retângulo arredondado girado em torno do centro
+BROW_WIDTH = 45
+BROW_HEIGHT = 8
+BROW_REACH = math.ceil(math.hypot(BROW_WIDTH, BROW_HEIGHT) / 2) + 2
+
+
+# =============================================================================
+# ESTATÍSTICAS DE FRAME
+# =============================================================================
+class FrameStats:
+    """Janelas móveis de tempo de frame e de paint, com frames perdidos."""
+
+    def __init__(self, window: int = CONFIG["frame_stats_window"]):
+        self.frame_ms: deque = deque(maxlen=window)
+        self.paint_ms: deque = deque(maxlen=window)
+        self.frames = 0
+        self.dropped = 0
+
+    def record_frame(self, dt: float, interval: float):
+        """Registra um passo de animação; atrasos > 1.5 intervalo contam como perdidos."""
+        self.frames += 1
+        self.frame_ms.append(dt * 1000)
+        if dt > interval * 1.5:
+            self.dropped += int(dt / interval + 0.5) - 1
+
+    def record_paint(self, seconds: float):
+        self.paint_ms.append(seconds * 1000)
+
+    @staticmethod
+    def histogram(samples: deque) -> dict:
+        if not samples:
+            return {"count": 0}
+        values = np.fromiter(samples, dtype=np.float64, count=len(samples))
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        return {
+            "count": len(values),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(values.max()), 3),
+        }
+
+    def summary(self) -> dict:
+        total_ms = sum(self.frame_ms)
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "fps": round(len(self.frame_ms) * 1000 / total_ms, 2) if total_ms else 0.0,
+            "frame_ms": self.histogram(self.frame_ms),
+            "paint_ms": self.histogram(self.paint_ms),
+        }
+
+
+# =============================================================================
+# FPS ADAPTATIVO
+# =============================================================================
+class AdaptiveFps:
+    """Escolhe o FPS a partir do movimento medido, com histerese.
+
+    Sobe na hora quando o movimento pede mais frames; só desce depois de
+    `hold` segundos pedindo menos, para o maior valor pedido nesse tempo.
+    """
+
+    def __init__(self, floor: int, ceiling: int, step: int, hold: float):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.step = step
+        self.hold = hold
+        self.fps = floor
+        self.calm = 0.0  # Tempo pedindo menos que o FPS atual
+        self.pending = floor  # Maior pedido durante a calmaria
+
+    def update(self, demand: float, dt: float) -> int:
+        """Registra o FPS pedido pelo movimento e retorna o FPS a usar."""
+        target = math.ceil(demand / self.step) * self.step
+        target = max(self.floor, min(self.ceiling, target))
+
+        if target >= self.fps:
+            self.fps = target
+            self.calm = 0.0
+            self.pending = self.floor
+        else:
+            self.calm += dt
+            self.pending = max(self.pending, target)
+            if self.calm >= self.hold:
+                self.fps = self.pending
+                self.calm = 0.0
+                self.pending = self.floor
+        return self.fps
+
+
+# =============================================================================
+# LOOPS PRÉ-RENDERIZADOS (modo baixo consumo)
+# =============================================================================
+class BakedLoop:
+    """Um período de animação pré-renderizado, tocado em loop.
+
+    Quadros idênticos são guardados uma vez só (`sequence` aponta para eles).
+    Os pixels ficam num array NumPy em memória ou, com CONFIG["loop_cache_dir"],
+    num arquivo temporário mapeado (np.memmap).
+    """
+
+    def __init__(self, width: int, height: int, dpr: float, period: float,
+                 frame_count: int, capacity: int, emit_interval: Optional[float]):
+        self.width = math.ceil(width * dpr)
+        self.height = math.ceil(height * dpr)
+        self.dpr = dpr
+        self.period = period
+        self.fps = frame_count / period
+        self.frame_count = frame_count
+        self.emit_interval = emit_interval
+
+        shape = (capacity, self.height, self.width, 4)
+        self._file = None
+        if CONFIG["loop_cache_dir"]:
+            self._file = tempfile.TemporaryFile(dir=CONFIG["loop_cache_dir"], prefix="pipface_loop_")
+            self.pixels = np.memmap(self._file, dtype=np.uint8, mode="w+", shape=shape)
+        else:
+            self.pixels = np.zeros(shape, dtype=np.uint8)  # Páginas só alocadas ao usar
+
+        self.unique = 0
+        self.sequence: list[int] = []  # Quadro do loop -> índice em pixels
+        self.dirty: list[list[QRect]] = []  # O que muda em relação ao quadro anterior
+        self.particle_counts: list[int] = []
+        self._images: dict = {}
+
+    def new_image(self) -> tuple:
+        """Reserva um quadro único novo; retorna (índice, QImage sobre os pixels)."""
+        index = self.unique
+        self.unique += 1
+        image = self.image(index)
+        image.fill(Qt.GlobalColor.transparent)
+        return index, image
+
+    def image(self, index: int) -> QImage:
+        """QImage sem cópia sobre os pixels do quadro único `index`."""
+        image = self._images.get(index)
+        if image is None:
+            image = QImage(
+                sip.voidptr(self.pixels[index].ctypes.data),
+                self.width, self.height, self.width * 4,
+                QImage.Format.Format_ARGB32_Premultiplied
+            )
+            image.setDevicePixelRatio(self.dpr)
+            self._images[index] = image
+        return image
+
+    def frame_at(self, t: float) -> int:
+        """Quadro do loop no instante t do relógio da animação."""
+        return int((t % self.period) * self.fps) % self.frame_count
+
+    def next_emission(self, t: float) -> float:
+        """Segundos até a próxima emissão automática de partículas no loop."""
+        return -(t % self.period) % self.emit_interval
+
+    def close(self):
+        self._images.clear()
+        self.pixels = None
+        if self._file is not None:
+            self._file.close()
 
 
 # =============================================================================
 # ESTADOS E EXPRESSÕES
 # =============================================================================
-@dataclass
+class FaceField:
+    """Campo nomeado de FaceState: uma posição fixa no vetor de valores."""
+
+    def __init__(self, default: float, scale: float = 1.0):
+        self.default = default
+        self.scale = scale  # Tamanho de uma mudança "cheia" (para medir movimento)
+        self.index = -1
+
+    def __set_name__(self, owner, name):
+        # A ordem de declaração na classe define o layout do vetor
+        self.index = len(owner.FIELDS)
+        owner.FIELDS.append(name)
+
+    def __get__(self, state, owner=None):
+        if state is None:
+            return self
+        return float(state.values[self.index])
+
+    def __set__(self, state, value: float):
+        state.values[self.index] = value
+
+
 class FaceState:
-    """Estado atual da face com valores animáveis."""
+    """Estado atual da face com valores animáveis.
+
+    Os valores ficam num vetor NumPy com layout fixo (a ordem dos campos
+    abaixo), e cada campo continua acessível pelo nome. Os campos
+    interpolados vêm primeiro, então interpolar é uma operação vetorial.
+    """
+
+    __slots__ = ("values",)
+    FIELDS: list[str] = []
+
     # Olhos
-    eye_open: float = 1.0  # 0 = fechado, 1 = aberto
-    eye_size: float = 1.0  # Escala dos olhos
-    pupil_x: float = 0.0  # Offset da pupila (-1 a 1)
-    pupil_y: float = 0.0
-    pupil_size: float = 0.5  # Tamanho relativo da pupila
+    eye_open = FaceField(1.0)  # 0 = fechado, 1 = aberto
+    eye_size = FaceField(1.0)  # Escala dos olhos
+    pupil_x = FaceField(0.0)  # Offset da pupila (-1 a 1)
+    pupil_y = FaceField(0.0)
+    pupil_size = FaceField(0.5)  # Tamanho relativo da pupila
 
     # Sobrancelhas
-    brow_left_y: float = 0.0  # Offset Y (-1 = baixo/raiva, 1 = alto/surpresa)
-    brow_right_y: float = 0.0
-    brow_left_angle: float = 0.0  # Ângulo em graus
-    brow_right_angle: float = 0.0
+    brow_left_y = FaceField(0.0)  # Offset Y (-1 = baixo/raiva, 1 = alto/surpresa)
+    brow_right_y = FaceField(0.0)
+    brow_left_angle = FaceField(0.0, scale=30.0)  # Ângulo em graus
+    brow_right_angle = FaceField(0.0, scale=30.0)
 
     # Boca
-    mouth_open: float = 0.0  # 0 = fechada, 1 = aberta
-    mouth_width: float = 0.6  # Largura relativa
-    mouth_curve: float = 0.0  # -1 = triste, 0 = neutro, 1 = sorriso
+    mouth_open = FaceField(0.0)  # 0 = fechada, 1 = aberta
+    mouth_width = FaceField(0.6)  # Largura relativa
+    mouth_curve = FaceField(0.0)  # -1 = triste, 0 = neutro, 1 = sorriso
 
     # Geral
-    face_color: tuple = field(default_factory=lambda: CONFIG["face_color"])
-    blush_alpha: float = 0.0  # 0 = sem rubor, 1 = rubor máximo
-    shake: float = 0.0  # Intensidade do tremor
-    float_y: float = 0.0  # Flutuação vertical
+    blush_alpha = FaceField(0.0)  # 0 = sem rubor, 1 = rubor máximo
+    shake = FaceField(0.0)  # Intensidade do tremor
+    face_r = FaceField(CONFIG["face_color"][0], scale=255.0)  # Cor da face (ver face_color)
+    face_g = FaceField(CONFIG["face_color"][1], scale=255.0)
+    face_b = FaceField(CONFIG["face_color"][2], scale=255.0)
+
+    # Calculados a cada frame (não interpolados)
+    float_y = FaceField(0.0)  # Flutuação vertical
+
+    def __init__(self, face_color: Optional[tuple] = None, **fields):
+        self.values = FACE_DEFAULTS.copy()
+        if face_color is not None:
+            self.face_color = face_color
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @property
+    def face_color(self) -> tuple:
+        return tuple(int(round(c)) for c in self.values[COLOR_FIELDS])
+
+    @face_color.setter
+    def face_color(self, color: tuple):
+        self.values[COLOR_FIELDS] = color[:3]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value:g}" for name, value in zip(self.FIELDS, self.values))
+        return f"FaceState({fields})"
+
+    def as_dict(self) -> dict:
+        return {name: round(float(value), 4) for name, value in zip(self.FIELDS, self.values)}
+
+
+FACE_DEFAULTS = np.array([getattr(FaceState, name).default for name in FaceState.FIELDS])
+MOTION_SCALE = np.array([getattr(FaceState, name).scale for name in FaceState.FIELDS])
+COLOR_FIELDS = slice(FaceState.face_r.index, FaceState.face_b.index + 1)
+LERP_FIELDS = slice(0, FaceState.float_y.index)  # Tudo que é interpolado
 
 
 # Definição de expressões predefinidas
@@ -280,46 +839,855 @@ EXPRESSIONS = {
     # ),
 }
 
+# Vetores das expressões: compilados uma vez, copiados direto no alvo
+for _expr in EXPRESSIONS.values():
+    _expr.values.flags.writeable = False
+
+
+# =============================================================================
+# STREAM DE AMPLITUDE (LIP-SYNC)
+# =============================================================================
+class AmplitudeStream:
+    """Amostras de amplitude com timestamp, tocadas com atraso fixo (jitter buffer).
+
+    Os pacotes {"amplitude_samples": [...], "t": t0, "rate": hz} não passam
+    pela fila de comandos: o endpoint guarda as amostras aqui (ring) e cada
+    frame lê o valor interpolado no seu próprio instante. O relógio do
+    remetente vira o local pelo menor atraso de chegada recente, e a
+    reprodução fica `delay` segundos atrás, o que absorve o jitter.
+    """
+
+    def __init__(self, size: int, delay: float, timeout: float, on_start=None):
+        self.samples: deque = deque(maxlen=size)  # (t do remetente, amplitude), em ordem
+        self.delay = delay
+        self.timeout = timeout
+        self.on_start = on_start  # Chamado (na thread do socket) quando um stream começa
+        self.lock = threading.Lock()  # push na thread do socket, sample na da GUI
+        self.offsets: deque = deque(maxlen=64)  # Chegada local - t do remetente, por pacote
+        self.offset = 0.0
+        self.rate = 0
+        self.active = False
+        self.last_arrival = 0.0
+        self.played = -math.inf  # Último instante (do remetente) já tocado
+        self.received = 0
+        self.late = 0  # Amostras fora de ordem ou que chegaram depois de tocadas
+        self.underruns = 0  # Frames sem amostra à frente (buffer vazio)
+        self.rejected = 0  # Pacotes descartados (t, taxa ou amostra não finitos)
+
+    def push(self, t0: float, rate: int, values: list) -> bool:
+        """Guarda um pacote do stream; False se ele foi descartado.
+
+        t0, rate e as amostras precisam ser finitos (rate > 0): um NaN aqui
+        chegaria à geometria da boca. As amostras são limitadas a [0, 1].
+        """
+        if not (math.isfinite(t0) and math.isfinite(rate) and rate > 0 and all(map(math.isfinite, values))):
+            self.rejected += 1
+            return False
+        values = [min(max(value, 0.0), 1.0) for value in values]
+        now = time.perf_counter()
+        step = 1.0 / rate
+        with self.lock:
+            started = not self.active or now - self.last_arrival > self.timeout
+            if started:
+                # Stream novo: o relógio do remetente pode ser outro
+                self.samples.clear()
+                self.offsets.clear()
+                self.played = -math.inf
+                self.active = True
+            self.offsets.append(now - (t0 + (len(values) - 1) * step))
+            self.offset = min(self.offsets)
+            self.rate = rate
+            self.last_arrival = now
+            self.received += len(values)
+
+            newest = self.samples[-1][0] if self.samples else -math.inf
+            for i, value in enumerate(values):
+                t = t0 + i * step
+                if t <= newest or t < self.played:
+                    self.late += 1
+                    continue
+                self.samples.append((t, value))
+                newest = t
+        if started and self.on_start is not None:
+            self.on_start()
+        return True
+
+    def sample(self, now: float) -> Optional[float]:
+        """Amplitude no instante local `now`; None sem stream ativo."""
+        with self.lock:
+            if not self.active:
+                return None
+            t = now - self.offset - self.delay  # No relógio do remetente
+            samples = self.samples
+            while len(samples) >= 2 and samples[1][0] <= t:
+                samples.popleft()
+            self.played = t
+
+            if not samples or t >= samples[-1][0]:
+                if now - self.last_arrival > self.timeout:
+                    self.active = False  # Stream acabou
+                    return None
+                self.underruns += 1
+                return samples[-1][1] if samples else 0.0  # Segura o último valor
+            if t <= samples[0][0]:
+                return samples[0][1]
+            (t0, v0), (t1, v1) = samples[0], samples[1]
+            return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "rate": self.rate,
+            "buffered": len(self.samples),
+            "received": self.received,
+            "late": self.late,
+            "underruns": self.underruns,
+            "rejected": self.rejected,
+        }
+
 
 # =============================================================================
 # COMUNICAÇÃO SOCKET
 # =============================================================================
 class SocketSignals(QObject):
     command_received = pyqtSignal(dict)
+    amplitude_started = pyqtSignal()  # Primeira amostra de um stream de amplitude
+
 
+def particle_counts(value) -> dict:
+    """{tipo: quantidade} válido de um comando (o resto é descartado).
 
-class SocketServer(threading.Thread):
-    def __init__(self, port: int, signals: SocketSignals):
+    Exige um dict com tipos str e quantidades int, limitadas a particle_burst_max.
+    """
+    if not isinstance(value, dict):
+        return {}
+    limit = CONFIG["particle_burst_max"]
+    return {
+        kind: min(max(count, 0), limit)
+        for kind, count in value.items()
+        if isinstance(kind, str) and isinstance(count, int) and not isinstance(count, bool)
+    }
+
+
+def coalesce_commands(commands: list) -> dict:
+    """Junta vários comandos num só, na ordem de chegada.
+
+    `state`/`emotion` (viram um `state` só, com o `source` de quem pediu): vale
+    o último de maior prioridade. `amplitude` e chaves desconhecidas: vale o
+    último. Partículas se acumulam em `particles` ({tipo: quantidade})
+    e timelines em `timelines` (na ordem, cada uma com seu `mode`). Em `_acks`
+    fica o maior seq de cada cliente que pediu confirmação; consultas
+    (`_queries`) e assinaturas (`_subscriptions`) valem todas, na ordem.
+    """
+    if len(commands) == 1:
+        return commands[0]
+
+    merged: dict = {}
+    particles: dict = {}
+    timelines: list = []
+    acks: dict = {}
+    replies: dict = {}  # _queries / _subscriptions, na ordem
+    state_priority = None
+    for cmd in commands:
+        for key, value in cmd.items():
+            if key in ("state", "emotion"):
+                priority = source_priority(cmd.get("source")) if CONFIG["arbitration"] else 0
+                if state_priority is not None and priority < state_priority:
+                    continue  # Fonte de prioridade menor não sobrescreve no mesmo lote
+                state_priority = priority
+                merged["state"] = value
+                merged.pop("source", None)
+                if "source" in cmd:
+                    merged["source"] = cmd["source"]
+                timelines.clear()  # Estado explícito cancela timelines anteriores
+            elif key in ("timeline", "mode", "source"):
+                pass
+            elif key == "timelines":
+                timelines.extend(value)
+            elif key == "_acks":
+                for target, seq in value.items():
+                    acks[target] = max(acks.get(target, seq), seq)
+            elif key in ("_queries", "_subscriptions"):
+                replies.setdefault(key, []).extend(value)
+            elif key == "particle":
+                if isinstance(value, str):
+                    particles[value] = particles.get(value, 0) + 3
+            elif key == "particles":
+                for kind, count in particle_counts(value).items():
+                    particles[kind] = particles.get(kind, 0) + count
+            else:
+                merged[key] = value
+        if "timeline" in cmd:
+            timelines.append({
+                "timeline": cmd["timeline"], "mode": cmd.get("mode", "replace"), "source": cmd.get("source")
+            })
+    if particles:
+        merged["particles"] = particles
+    if timelines:
+        merged["timelines"] = timelines
+    if acks:
+        merged["_acks"] = acks
+    merged.update(replies)
+    return merged
+
+
+def parse_command(data: bytes, commands: list, reply: Optional[tuple] = None,
+                  amplitude: Optional[AmplitudeStream] = None,
+                  sequences: Optional["SequenceFilter"] = None):
+    """Decodifica um datagrama (binário ou JSON) e anexa o comando (ignora lixo).
+
+    Amostras de amplitude vão direto para `amplitude` (não viram comando).
+
+    Com "ack": true e "seq", o comando leva em `_acks` para onde confirmar (um
+    seq que `sequences` já viu é retransmissão: só a confirmação fica); uma
+    consulta ("query") vai em `_queries` e um "subscribe"/"unsubscribe" em
+    `_subscriptions`, com o destino da resposta:
+    `reply` = (socket, endereço de origem), endereço None numa conexão stream.
+    Sem `reply` (cliente sem endereço) não há para onde responder.
+    """
+    cmd = decode_command(data)
+    if cmd is None:
+        return
+    if "amplitude_samples" in cmd:
+        if amplitude is not None:
+            try:
+                amplitude.push(float(cmd["t"]), int(cmd["rate"]), [float(v) for v in cmd["amplitude_samples"]])
+            except (KeyError, TypeError, ValueError, ZeroDivisionError, OverflowError):
+                pass
+        return
+    if cmd.get("ack") is True and isinstance(cmd.get("seq"), int):
+        del cmd["ack"]
+        seq = cmd.pop("seq")
+        if reply is not None:
+            if sequences is not None and sequences.seen(reply, seq):
+                cmd = {}  # Já aplicado: confirma de novo sem reaplicar
+            cmd["_acks"] = {reply: seq}
+    if "query" in cmd:
+        query = cmd.pop("query")
+        if reply is not None:
+            cmd["_queries"] = [(reply, query)]
+    if "subscribe" in cmd or "unsubscribe" in cmd:
+        events = cmd.pop("subscribe", ())
+        if cmd.pop("unsubscribe", False):
+            events = ()
+        lease = cmd.pop("lease", None)
+        if reply is not None:
+            cmd["_subscriptions"] = [(reply, events, lease)]
+    if cmd:
+        commands.append(cmd)
+
+
+def send_reply(target: tuple, data: bytes):
+    """Responde a um cliente: (socket, endereço) ou (conexão stream, None)."""
+    sock, address = target
+    if address is None:
+        sock.sendall(frame(data))
+    else:
+        sock.sendto(data, address)
+
+
+def drain_commands(sock: socket.socket, commands: list, amplitude: Optional[AmplitudeStream] = None,
+                   sequences: Optional["SequenceFilter"] = None):
+    """Lê sem bloquear tudo que já chegou no socket (até socket_batch_max)."""
+    try:
+        while len(commands) < CONFIG["socket_batch_max"]:
+            data, address = sock.recvfrom(CONFIG["udp_max_payload"])
+            parse_command(data, commands, (sock, address), amplitude, sequences)
+    except (BlockingIOError, socket.timeout):
+        pass
+
+
+PEER_CREDENTIALS = struct.Struct("3i")  # pid, uid, gid (SO_PEERCRED / SCM_CREDENTIALS)
+
+
+class CommandEndpoint:
+    """Socket(s) por onde chegam os comandos.
+
+    UDP em 127.0.0.1 (padrão) ou AF_UNIX com CONFIG["unix_socket"], em
+    datagrama ou stream (frames com tamanho, ver pip_face_protocol). No
+    AF_UNIX só passam processos do mesmo usuário ou de unix_allowed_uids:
+    SO_PEERCRED no stream, SCM_CREDENTIALS no datagrama, e o arquivo do
+    socket fica com permissão 0600.
+    """
+
+    def __init__(self, port: int, amplitude: Optional[AmplitudeStream] = None):
+        self.port = port
+        self.amplitude = amplitude  # Destino das amostras de amplitude (stream de lip-sync)
+        self.sequences = SequenceFilter(CONFIG["sequence_clients"])  # Só lido na thread do endpoint
+        self.path = CONFIG["unix_socket"]
+        self.stream = bool(self.path) and CONFIG["unix_socket_type"] == "stream"
+        self.connections: dict = {}  # Conexão stream -> buffer de bytes
+        self.dropped: list = []  # Conexões encerradas, fechadas em reap()
+        self.rejected = 0  # Peers/datagramas recusados pela credencial
+
+        if self.path:
+            self.allowed_uids = set(CONFIG["unix_allowed_uids"]) | {os.getuid()}
+            self.listener = self.open_unix()
+        else:
+            self.listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.listener.bind(("127.0.0.1", self.port))
+            self.port = self.listener.getsockname()[1]
+        self.listener.setblocking(False)
+
+    @property
+    def family(self) -> str:
+        if not self.path:
+            return "udp"
+        return "unix-stream" if self.stream else "unix-dgram"
+
+    def open_unix(self) -> socket.socket:
+        address = unix_address(self.path)
+        if not self.path.startswith("@") and os.path.exists(address):
+            # Só apaga socket velho de uma execução anterior, nunca um arquivo comum
+            if not stat.S_ISSOCK(os.stat(address).st_mode):
+                raise FileExistsError(f"unix_socket {address!r} existe e não é um socket")
+            os.unlink(address)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM if self.stream else socket.SOCK_DGRAM)
+        sock.bind(address)
+        if not self.path.startswith("@"):
+            os.chmod(address, 0o600)
+        if self.stream:
+            sock.listen(16)
+        elif hasattr(socket, "SO_PASSCRED"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_PASSCRED, 1)
+        return sock
+
+    def sockets(self) -> list:
+        """Sockets a vigiar (o listener e as conexões stream abertas)."""
+        return [self.listener, *self.connections]
+
+    def read(self, sock: socket.socket, commands: list):
+        """Trata `sock` pronto para leitura, anexando os comandos recebidos."""
+        if sock is not self.listener:
+            self.read_stream(sock, commands)
+        elif self.stream:
+            self.accept()
+        elif self.path:
+            self.drain_unix_datagrams(commands)
+        else:
+            drain_commands(sock, commands, self.amplitude, self.sequences)
+
+    def accept(self):
+        try:
+            conn, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        if hasattr(socket, "SO_PEERCRED"):
+            creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, PEER_CREDENTIALS.size)
+            _, uid, _ = PEER_CREDENTIALS.unpack(creds)
+            if uid not in self.allowed_uids:
+                self.rejected += 1
+                conn.close()
+                return
+        conn.setblocking(False)
+        self.connections[conn] = bytearray()
+
+    def drain_unix_datagrams(self, commands: list):
+        passcred = hasattr(socket, "SO_PASSCRED")
+        ancillary = socket.CMSG_SPACE(PEER_CREDENTIALS.size) if passcred else 0
+        try:
+            while len(commands) < CONFIG["socket_batch_max"]:
+                data, ancdata, flags, address = self.listener.recvmsg(CONFIG["unix_max_payload"], ancillary)
+                if passcred and not self.credentials_allowed(ancdata):
+                    self.rejected += 1
+                elif not flags & socket.MSG_TRUNC:
+                    # Cliente sem endereço (socket não vinculado) não recebe ack
+                    reply = (self.listener, address) if address else None
+                    parse_command(data, commands, reply, self.amplitude, self.sequences)
+        except BlockingIOError:
+            pass
+
+    def credentials_allowed(self, ancdata: list) -> bool:
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_CREDENTIALS:
+                _, uid, _ = PEER_CREDENTIALS.unpack(data[:PEER_CREDENTIALS.size])
+                return uid in self.allowed_uids
+        return False
+
+    def read_stream(self, conn: socket.socket, commands: list):
+        buffer = self.connections[conn]
+        try:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    self.drop(conn)
+                    break
+                buffer += chunk
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.drop(conn)
+
+        # Frames completos: [tamanho:u32][comando]
+        offset = 0
+        header = FRAME_HEADER.size
+        while len(buffer) - offset >= header:
+            (size,) = FRAME_HEADER.unpack_from(buffer, offset)
+            if size > CONFIG["unix_max_payload"]:
+                self.drop(conn)  # Fora do protocolo: encerra a conexão
+                return
+            end = offset + header + size
+            if len(buffer) < end:
+                break
+            parse_command(
+                bytes(buffer[offset + header:end]), commands, (conn, None), self.amplitude, self.sequences
+            )
+            offset = end
+        del buffer[:offset]
+
+    def drop(self, conn: socket.socket):
+        if self.connections.pop(conn, None) is not None:
+            self.dropped.append(conn)
+
+    def reap(self):
+        """Fecha as conexões encerradas (depois de parar de vigiá-las)."""
+        for conn in self.dropped:
+            conn.close()
+        self.dropped.clear()
+
+    def close(self):
+        for conn in [*self.connections, *self.dropped]:
+            conn.close()
+        self.connections.clear()
+        self.dropped.clear()
+        self.listener.close()
+        if self.path and not self.path.startswith("@"):
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class CommandBatches:
+    """Entrega de lotes e contadores comuns aos dois transportes."""
+
+    signals: SocketSignals
+    endpoint: Optional[CommandEndpoint] = None
+    transport = ""
+    commands = 0  # Comandos recebidos
+    batches = 0  # Sinais emitidos (um por lote)
+
+    def dispatch(self, commands: list):
+        if commands:
+            self.commands += len(commands)
+            self.batches += 1
+            self.signals.command_received.emit(coalesce_commands(commands))
+
+    def stats(self) -> dict:
+        return {
+            "transport": self.transport,
+            "family": self.endpoint.family if self.endpoint else None,
+            "commands": self.commands,
+            "batches": self.batches,
+            "merged": self.commands - self.batches,  # Comandos absorvidos por lotes
+            "rejected": self.endpoint.rejected if self.endpoint else 0,
+            "duplicates": self.endpoint.sequences.duplicates if self.endpoint else 0,
+        }
+
+
+class SocketServer(CommandBatches, threading.Thread):
+    """Recebe comandos numa thread própria e entrega à GUI por sinal (fila do Qt)."""
+
+    transport = "thread"
+
+    def __init__(self, port: int, signals: SocketSignals, amplitude: Optional[AmplitudeStream] = None):
         super().__init__(daemon=True)
         self.port = port
         self.signals = signals
+        self.amplitude = amplitude
         self.running = True
-        self.socket: Optional[socket.socket] = None
+        self.ready = threading.Event()  # Endpoint aberto (porta/caminho já valem)
 
     def run(self):
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.socket.bind(("127.0.0.1", self.port))
-        self.socket.settimeout(0.5)
+        self.endpoint = CommandEndpoint(self.port, self.amplitude)
+        self.port = self.endpoint.port
+        self.ready.set()
 
         while self.running:
             try:
-                data, _ = self.socket.recvfrom(1024)
-                try:
-                    cmd = json.loads(data.decode("utf-8"))
-                    self.signals.command_received.emit(cmd)
-                except json.JSONDecodeError:
-                    pass
-            except socket.timeout:
-                continue
+                ready, _, _ = select.select(self.endpoint.sockets(), [], [], 0.5)
+
+                # Esvaziar tudo que já chegou e mandar um lote só para a GUI
+                commands = []
+                for sock in ready:
+                    self.endpoint.read(sock, commands)
+                self.endpoint.reap()
+                self.dispatch(commands)
             except Exception as e:
                 if self.running:
                     print(f"Socket error: {e}")
 
     def stop(self):
         self.running = False
-        if self.socket:
-            self.socket.close()
+        if self.endpoint:
+            self.endpoint.close()
+
+
+class QtSocketServer(CommandBatches, QObject):
+    """Recebe comandos no event loop do Qt, direto na thread da GUI.
+
+    Um QSocketNotifier por socket avisa quando há dados: sem thread extra,
+    sem acordar a cada 0.5s e sem a fila entre threads do SocketServer.
+    """
+
+    transport = "qt"
+
+    def __init__(self, port: int, signals: SocketSignals, amplitude: Optional[AmplitudeStream] = None):
+        super().__init__()
+        self.port = port
+        self.signals = signals
+        self.amplitude = amplitude
+        self.ready = threading.Event()
+        self.notifiers: dict = {}  # socket -> QSocketNotifier
+
+    def start(self):
+        self.endpoint = CommandEndpoint(self.port, self.amplitude)
+        self.port = self.endpoint.port
+        self.watch()
+        self.ready.set()
+
+    def watch(self):
+        """Um notifier por socket do endpoint (conexões stream entram e saem)."""
+        sockets = self.endpoint.sockets()
+        for sock in list(self.notifiers):
+            if sock not in sockets:
+                self.notifiers.pop(sock).setEnabled(False)
+        for sock in sockets:
+            if sock not in self.notifiers:
+                notifier = QSocketNotifier(sock.fileno(), QSocketNotifier.Type.Read, self)
+                notifier.activated.connect(lambda *_, sock=sock: self.read_pending(sock))
+                self.notifiers[sock] = notifier
+
+    def read_pending(self, sock: socket.socket):
+        commands = []
+        try:
+            self.endpoint.read(sock, commands)
+        except OSError as e:
+            print(f"Socket error: {e}")
+        self.watch()
+        self.endpoint.reap()
+        self.dispatch(commands)
+
+    def stop(self):
+        for notifier in self.notifiers.values():
+            notifier.setEnabled(False)
+        self.notifiers.clear()
+        if self.endpoint:
+            self.endpoint.close()
+
+
+SOCKET_TRANSPORTS = {"thread": SocketServer, "qt": QtSocketServer}
+
+
+class AckChannel:
+    """Confirmações dos comandos, só para os clientes que pediram.
+
+    Quem manda "ack": true com "seq" recebe "aplicado até o seq N" (+ estado
+    atual) pelo próprio socket do endpoint: para o endereço de origem, ou
+    pela conexão no AF_UNIX stream. Sob carga as confirmações se juntam e
+    saem no máximo a cada `interval` segundos.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.pending: dict = {}  # (socket, endereço) -> maior seq aplicado
+        self.state_name = "idle"
+        self.last_flush = 0.0
+        self.requests = 0  # Comandos que pediram confirmação
+        self.sent = 0  # Confirmações enviadas
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def applied(self, acks: dict, state_name: str):
+        """Registra comandos aplicados; confirma já ou no próximo lote."""
+        for target, seq in acks.items():
+            self.pending[target] = max(self.pending.get(target, seq), seq)
+        self.requests += len(acks)
+        self.state_name = state_name
+
+        wait = self.last_flush + self.interval - time.perf_counter()
+        if wait <= 0:
+            self.flush()
+        elif not self.timer.isActive():
+            self.timer.start(math.ceil(wait * 1000))
+
+    def flush(self):
+        for target, seq in self.pending.items():
+            try:
+                send_reply(target, encode_command({"ack": seq, "state": self.state_name}))
+                self.sent += 1
+            except OSError:
+                pass  # Cliente já foi embora
+        self.pending.clear()
+        self.last_flush = time.perf_counter()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "sent": self.sent}
+
+
+class SequenceFilter:
+    """Descarta retransmissões: os seqs vistos de cada cliente.
+
+    Guarda o maior seq visto e, numa máscara de bits, quais dos `window` seqs
+    abaixo dele já chegaram: um datagrama reordenado (mais velho, mas ainda
+    não visto) é aplicado, só a repetição é descartada. Mais para trás que a
+    máscara já não dá para saber e conta como repetido; mais que `restart`,
+    é um cliente novo no mesmo endereço.
+    """
+
+    def __init__(self, size: int, window: int = 64, restart: int = 1024):
+        self.size = size
+        self.window = window
+        self.restart = restart
+        self.last: OrderedDict = OrderedDict()  # (socket, endereço) -> (maior seq, máscara) (LRU)
+        self.duplicates = 0
+
+    def seen(self, target: tuple, seq: int) -> bool:
+        """True se `seq` já foi visto de `target` (senão passa a constar como visto)."""
+        entry = self.last.get(target)
+        if entry is None or not -self.restart < entry[0] - seq < self.restart:
+            entry = (seq, 1)  # Bit 0 = o próprio maior seq
+        elif seq > entry[0]:
+            high, mask = entry
+            entry = (seq, (mask << (seq - high) | 1) & ((1 << self.window) - 1))
+        else:
+            high, mask = entry
+            bit = 1 << (high - seq)
+            if high - seq >= self.window or mask & bit:
+                self.last.move_to_end(target)
+                self.duplicates += 1
+                return True
+            entry = (high, mask | bit)
+        self.last[target] = entry
+        self.last.move_to_end(target)
+        if len(self.last) > self.size:
+            self.last.popitem(last=False)
+        return False
+
+
+# Campo publicado -> evento que o assinante filtra
+SUBSCRIPTION_FIELDS = {"state": "state", "sleeping": "sleep"}
+
+
+class Subscription:
+    """Um assinante: filtro, prazo da lease e o que falta mandar para ele."""
+
+    def __init__(self, events: set, expires: float):
+        self.events = events
+        self.expires = expires  # perf_counter em que a lease vence
+        self.sent: dict = {}  # Últimos valores enviados (base do delta)
+        self.pending: dict = {}  # Valores publicados desde a última notificação
+        self.particles: dict = {}  # Partículas emitidas desde a última notificação
+        self.next_send = 0.0  # perf_counter a partir do qual pode notificar de novo
+        self.notifications = 0
+
+    def delta(self) -> dict:
+        """O que mudou desde a última notificação (consome o pendente)."""
+        delta = {key: value for key, value in self.pending.items() if self.sent.get(key) != value}
+        self.sent.update(delta)
+        self.pending.clear()
+        if self.particles:
+            delta["particles"] = self.particles
+            self.particles = {}
+        return delta
+
+
+class SubscriptionHub:
+    """Notificações de mudança para vários assinantes (pub/sub).
+
+    {"subscribe": ["state", "particle", "sleep"], "lease": 30} registra o
+    remetente, que recebe de volta o estado atual e depois, pelo mesmo
+    socket, só o que mudou desde a última notificação (partículas somadas),
+    no máximo uma a cada `interval` segundos. Sem renovação (o mesmo
+    subscribe de novo) a lease vence e o assinante sai sozinho;
+    {"unsubscribe": true} sai na hora.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.subscribers: dict = {}  # (socket, endereço) -> Subscription
+        self.values: dict = {}  # Últimos valores publicados (estado da face)
+        self.sent = 0  # Notificações enviadas
+        self.expired = 0  # Leases vencidas
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def subscribe(self, target: tuple, events, lease):
+        """Registra ou renova `target`; eventos vazios cancelam a assinatura."""
+        now = time.perf_counter()
+        self.reap(now)
+        if events is True:
+            events = SUBSCRIPTION_EVENTS
+        if not isinstance(events, (list, tuple)):
+            events = ()
+        wanted = {event for event in SUBSCRIPTION_EVENTS if event in events}
+
+        if not wanted:
+            self.subscribers.pop(target, None)
+            self.send(target, {"subscribed": []})
+            self.schedule()
+            return
+        if target not in self.subscribers and len(self.subscribers) >= CONFIG["subscription_max"]:
+            self.send(target, {"subscribed": [], "error": "assinantes demais"})
+            return
+
+        # Lease vem da rede: NaN passaria pelo min() e quebraria o math.ceil do schedule()
+        try:
+            lease = float(lease)
+        except (TypeError, ValueError, OverflowError):
+            lease = 0.0
+        if not (math.isfinite(lease) and lease > 0):
+            lease = CONFIG["subscription_lease"]
+        lease = min(lease, CONFIG["subscription_lease_max"])
+
+        subscription = self.subscribers.setdefault(target, Subscription(wanted, now + lease))
+        subscription.events = wanted
+        subscription.expires = now + lease
+        # Resposta com o estado completo: a base dos próximos deltas
+        snapshot = {
+            key: value for key, value in self.values.items()
+            if SUBSCRIPTION_FIELDS[key] in wanted
+        }
+        subscription.sent = dict(snapshot)
+        subscription.pending.clear()
+        self.send(target, {"subscribed": sorted(wanted), "lease": lease, **snapshot})
+        self.schedule()
+
+    def publish(self, event: str, values: dict):
+        """Novos valores do estado da face (só viram notificação se mudaram)."""
+        self.values.update(values)
+        if not self.subscribers:
+            return
+        for subscription in self.subscribers.values():
+            if event in subscription.events:
+                subscription.pending.update(values)
+        self.schedule()
+
+    def publish_particles(self, particle_type: str, count: int):
+        if not self.subscribers:
+            return
+        for subscription in self.subscribers.values():
+            if "particle" in subscription.events:
+                particles = subscription.particles
+                particles[particle_type] = particles.get(particle_type, 0) + count
+        self.schedule()
+
+    def schedule(self):
+        """Arma o timer para a próxima notificação devida ou lease vencendo."""
+        if not self.subscribers:
+            self.timer.stop()
+            return
+        wake = min(
+            min(s.next_send, s.expires) if s.pending or s.particles else s.expires
+            for s in self.subscribers.values()
+        )
+        ms = max(0, math.ceil((wake - time.perf_counter()) * 1000))
+        if not self.timer.isActive() or self.timer.remainingTime() > ms:
+            self.timer.start(ms)
+
+    def flush(self):
+        now = time.perf_counter()
+        self.reap(now)
+        for target, subscription in list(self.subscribers.items()):
+            if subscription.next_send > now or not (subscription.pending or subscription.particles):
+                continue
+            delta = subscription.delta()
+            if delta:
+                subscription.notifications += 1
+                delta["notify"] = subscription.notifications  # Buracos = notificação perdida
+                subscription.next_send = now + self.interval
+                if not self.send(target, delta):
+                    del self.subscribers[target]  # Conexão fechada: não tem mais para quem mandar
+        self.schedule()
+
+    def send(self, target: tuple, message: dict) -> bool:
+        try:
+            send_reply(target, json.dumps(message).encode())
+        except OSError:
+            return False
+        self.sent += 1
+        return True
+
+    def reap(self, now: float):
+        """Remove assinantes com a lease vencida."""
+        expired = [target for target, s in self.subscribers.items() if s.expires <= now]
+        for target in expired:
+            del self.subscribers[target]
+        self.expired += len(expired)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self.subscribers), "sent": self.sent, "expired": self.expired}
+
+
+# =============================================================================
+# ARBITRAGEM DE ESTADOS
+# =============================================================================
+def source_priority(source) -> int:
+    """Prioridade de quem mandou o comando (campo "source")."""
+    priorities = CONFIG["source_priorities"]
+    if isinstance(source, str) and source in priorities:
+        return priorities[source]
+    return CONFIG["source_priority_default"]
+
+
+class StateArbiter:
+    """Decide se um estado pedido por comando vence o estado atual.
+
+    Pedir o estado que já está ativo é suprimido (no-op). Enquanto o estado
+    atual não cumpriu seu tempo mínimo na tela (state_dwell), só uma fonte
+    de prioridade maior que a dele passa; os outros pedidos ficam adiados e
+    o último deles é aplicado quando o dwell acaba.
+    """
+
+    APPLY, NOOP, DEFER = "apply", "noop", "defer"
+
+    def __init__(self):
+        self.state_name: Optional[str] = None
+        self.priority = CONFIG["source_priority_default"]  # De quem pôs o estado atual
+        self.since = 0.0  # perf_counter em que o estado atual entrou
+        self.deferred: Optional[tuple] = None  # (estado, prioridade) esperando o dwell
+        self.suppressed = 0  # Pedidos do estado já ativo
+        self.overridden = 0  # Pedidos adiados pelo dwell de um estado de prioridade >=
+        self.preempted = 0  # Dwells interrompidos por uma fonte de prioridade maior
+
+    def dwell_left(self, now: float) -> float:
+        return self.since + CONFIG["state_dwell"].get(self.state_name, 0.0) - now
+
+    def decide(self, state_name: str, priority: int, now: float, defer: bool = True) -> str:
+        """APPLY, NOOP ou DEFER; com defer=False quem perde não fica esperando o dwell."""
+        if state_name == self.state_name:
+            self.suppressed += 1
+            self.priority = max(self.priority, priority)
+            if defer:
+                self.deferred = None  # O pedido mais novo é ficar onde está
+            return self.NOOP
+        if self.dwell_left(now) > 0:
+            if priority <= self.priority:
+                self.overridden += 1
+                if defer:
+                    self.deferred = (state_name, priority)
+                return self.DEFER
+            self.preempted += 1
+        return self.APPLY
+
+    def held(self, state_name: str, priority: int, now: float):
+        """Registra um estado novo na tela (por comando ou pela própria face)."""
+        self.state_name = state_name
+        self.priority = priority
+        self.since = now
+        self.deferred = None
+
+    def stats(self) -> dict:
+        return {
+            "suppressed": self.suppressed,
+            "overridden": self.overridden,
+            "preempted": self.preempted,
+            "deferred": self.deferred[0] if self.deferred else None,
+        }
 
 
 # =============================================================================
@@ -334,13 +1702,30 @@ class PipFace(QWidget):
         self.target_state = FaceState()
         self.state_name = "idle"
         self.tick = 0
+        self.anim_time = 0.0  # Relógio da animação (s), avança pelo tempo real
         self.current_fps = CONFIG["fps_idle"]
-        self.dt = 1.0 / self.current_fps
+        self.dt = 1.0 / self.current_fps  # Intervalo nominal entre frames
+        self.fps_controller = AdaptiveFps(
+            CONFIG["fps_min"], CONFIG["fps_max"], CONFIG["fps_step"], CONFIG["fps_hold"]
+        )
+        self.amplitude_changes: deque = deque()  # Instantes das últimas mudanças de amplitude
+        self.watching_expose = False
+
+        # Ritmo de frames (perf_counter) e estatísticas
+        self.last_frame_time = time.perf_counter()
+        self.frame_stats = FrameStats()
+        self.last_stats_log = self.last_frame_time
 
         # Animação
-        self.blink_timer = 0
+        self.blink_timer = self.blink_wait()
         self.blink_duration = 0
         self.speech_amplitude = 0.0
+        self.speech_timer = 0.0
+
+        # Timeline de keyframes (agendada no relógio da animação)
+        self.timeline: deque = deque()  # Keyframes pendentes
+        self.keyframe_end = 0.0  # anim_time em que o próximo keyframe começa
+        self.ease: Optional[tuple] = None  # (início, curva, t0, duração) da transição
         self.mouse_pos = QPointF(0, 0)
 
         # Micro-saccades
@@ -352,6 +1737,10 @@ class PipFace(QWidget):
         self.particles = ParticleSystem()
         self.particle_cooldown = 0
 
+        # Camadas pré-renderizadas (fundo+blush e sobrancelhas)
+        self.face_cache = RenderCache(CONFIG["render_cache_face_size"])
+        self.brow_cache = RenderCache(CONFIG["render_cache_size"])
+
         # Drag
         self.drag_pos = None
 
@@ -360,14 +1749,49 @@ class PipFace(QWidget):
         self.auto_sleep_timeout = 300  # 5 minutos em segundos
         self.is_sleeping = False
 
+        # Repintura parcial: geometria do último frame e regiões sujas
+        self.layout: Optional[dict] = None
+        self.dirty_rects: list[QRect] = []
+        self.debug_dirty = CONFIG["debug_dirty_regions"]
+
+        # Loops pré-renderizados (modo baixo consumo)
+        self.loops: OrderedDict = OrderedDict()  # chave -> BakedLoop (None = não cabe)
+        self.loop: Optional[BakedLoop] = None  # Loop tocando agora
+        self.loop_key: Optional[tuple] = None
+        self.loop_frame = 0
+        self.loop_baker = None  # Gerador do bake em andamento
+        self.loop_baker_key: Optional[tuple] = None
+
+        # Cores fixas (evita criar QColor a cada frame)
+        self.colors = {
+            "eye": QColor(*CONFIG["eye_color"]),
+            "pupil": QColor(*CONFIG["pupil_color"]),
+            "brow": QColor(*CONFIG["brow_color"]),
+        }
+
         # Settings (persistência)
         self.settings = QSettings("MoltBot", "PipFace")
 
         # Socket
         self.socket_signals = SocketSignals()
         self.socket_signals.command_received.connect(self.handle_command)
-        self.socket_server = SocketServer(CONFIG["socket_port"], self.socket_signals)
+        self.socket_signals.amplitude_started.connect(self.amplitude_stream_started)
+        self.amplitude_stream = AmplitudeStream(
+            CONFIG["amplitude_buffer_size"], CONFIG["amplitude_jitter"],
+            CONFIG["amplitude_stream_timeout"], self.socket_signals.amplitude_started.emit,
+        )
+        server_class = SOCKET_TRANSPORTS[CONFIG["socket_transport"]]
+        self.socket_server = server_class(CONFIG["socket_port"], self.socket_signals, self.amplitude_stream)
         self.socket_server.start()
+        self.ack_channel = AckChannel(CONFIG["ack_interval"])
+        self.subscriptions = SubscriptionHub(CONFIG["subscription_interval"])
+
+        # Arbitragem: estado adiado pelo dwell entra quando este timer disparar
+        self.arbiter = StateArbiter()
+        self.dwell_timer = QTimer()
+        self.dwell_timer.setSingleShot(True)
+        self.dwell_timer.timeout.connect(self.apply_deferred_state)
+        self.feedback_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
         self.init_ui()
         self.init_tray()
@@ -375,7 +1799,17 @@ class PipFace(QWidget):
 
         # Timer principal
         self.timer = QTimer()
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.update_animation)
+
+        # Timer "estacionado": com a face convergida o timer principal para
+        # e só este dispara, no próximo prazo (piscada, flutuação, auto-sleep)
+        self.parked = False
+        self.park_time = 0.0
+        self.wake_timer = QTimer()
+        self.wake_timer.setSingleShot(True)
+        self.wake_timer.timeout.connect(self.resume_animation)
+
         self.update_fps()
 
         # Definir estado inicial
@@ -405,7 +1839,9 @@ class PipFace(QWidget):
         states_menu = menu.addMenu("Estado")
         for state in EXPRESSIONS.keys():
             action = QAction(state.capitalize(), self)
-            action.triggered.connect(lambda checked, s=state: self.set_state(s))
+            action.triggered.connect(
+                lambda checked, s=state: self.set_state(s, source_priority("local"))
+            )
             states_menu.addAction(action)
 
         # Partículas
@@ -451,19 +1887,153 @@ class PipFace(QWidget):
         self.move(x, y)
         self.save_position()
 
-    def update_fps(self):
-        """Ajusta FPS baseado no estado atual."""
-        target_fps = CONFIG["fps_idle"] if self.state_name in LOW_FPS_STATES else CONFIG["fps_active"]
+    def update_fps(self, dt: float = 0.0):
+        """Ajusta o FPS pelo movimento medido (ou pela categoria do estado)."""
+        if not self.is_on_screen():
+            target_fps = CONFIG["fps_hidden"]
+        elif CONFIG["fps_adaptive"]:
+            target_fps = self.fps_controller.update(self.motion_fps(), dt)
+        else:
+            target_fps = CONFIG["fps_idle"] if self.state_name in LOW_FPS_STATES else CONFIG["fps_active"]
 
         if target_fps != self.current_fps:
             self.current_fps = target_fps
             self.dt = 1.0 / self.current_fps
-            self.timer.stop()
-            self.timer.start(int(1000 / self.current_fps))
-        elif not self.timer.isActive():
+            if not self.parked:
+                self.timer.stop()
+                self.timer.start(int(1000 / self.current_fps))
+        elif not self.timer.isActive() and not self.parked:
             self.timer.start(int(1000 / self.current_fps))
 
+    def motion_fps(self) -> float:
+        """FPS que o movimento atual pede para andar no máximo fps_px_per_frame por frame."""
+        px_per_frame = CONFIG["fps_px_per_frame"]
+
+        # Flutuação: velocidade de pico do seno
+        speed, amplitude = FLOAT_CYCLES.get(self.state_name, DEFAULT_FLOAT_CYCLE)
+        velocity = speed * amplitude
+
+        # Interpolação: a distância até o alvo cai 8x por segundo (ver step)
+        distance = np.abs(
+            self.target_state.values[LERP_FIELDS] - self.current_state.values[LERP_FIELDS]
+        ) / MOTION_SCALE[LERP_FIELDS]
+        velocity = max(velocity, 8.0 * float(distance.max()) * CONFIG["fps_motion_px"])
+
+        velocity = max(velocity, self.particles.max_speed())
+        demand = velocity / px_per_frame
+
+        # Tremor é aleatório a cada frame: pede o máximo
+        if self.target_state.shake > 0.1:
+            demand = CONFIG["fps_max"]
+
+        # Stream de amplitude: um frame por amostra
+        if self.state_name == "speaking" and self.amplitude_stream.active:
+            demand = max(demand, self.amplitude_stream.rate)
+
+        # Amplitude de fala: um frame para cada mudança recebida
+        now = time.perf_counter()
+        while self.amplitude_changes and now - self.amplitude_changes[0] > 1.0:
+            self.amplitude_changes.popleft()
+        return max(demand, len(self.amplitude_changes))
+
+    def is_on_screen(self) -> bool:
+        """False com a janela escondida, minimizada ou totalmente coberta."""
+        if not self.isVisible() or self.isMinimized():
+            return False
+        window = self.windowHandle()
+        return window is None or window.isExposed()
+
+    def amplitude_stream_started(self):
+        """Primeira amostra de um stream: acorda a face e sobe o FPS."""
+        self.last_activity_time = time.time()
+        self.resume_animation()
+        self.update_fps()
+
+    def resume_animation(self):
+        """Religa o timer principal (comando, mouse ou prazo agendado)."""
+        if not self.parked:
+            return
+        self.parked = False
+        self.wake_timer.stop()
+
+        # Avançar o relógio da animação pelo tempo parado (não é frame perdido)
+        self.last_frame_time = time.perf_counter()
+        elapsed = self.last_frame_time - self.park_time
+        self.anim_time += elapsed
+        self.blink_timer -= elapsed
+        self.particle_cooldown -= elapsed
+
+        self.timer.start(int(1000 / self.current_fps))
+
+    def can_park(self) -> bool:
+        """True se nada vai se mexer até o próximo prazo agendado (e não há loop a tocar)."""
+        return (
+            CONFIG["park_when_idle"] and not len(self.particles) and self.is_converged()
+            and not self.wants_loop()
+        )
+
+    def wants_loop(self) -> bool:
+        """low_power_loops ligado e o estado tem (ou ainda pode ter) um loop pré-renderizado."""
+        if not CONFIG["low_power_loops"] or self.state_name not in LOW_FPS_STATES:
+            return False
+        return self.loops.get(self.current_loop_key(), True) is not None
+
+    def is_converged(self) -> bool:
+        """True se o estado atual chegou no alvo e não há piscada/tremor/drag."""
+        if self.drag_pos is not None or self.state_name in CONTINUOUS_STATES:
+            return False
+        if self.blink_duration > 0 or self.target_state.shake > 0.1 or self.ease is not None:
+            return False
+
+        current, target = self.current_state, self.target_state
+        if current.face_color != target.face_color:
+            return False
+        diff = np.abs(current.values[LERP_FIELDS] - target.values[LERP_FIELDS])
+        diff[COLOR_FIELDS] = 0  # Cor já comparada em inteiros
+        return diff.max() < CONFIG["park_epsilon"]
+
+    def park(self):
+        """Para o timer principal e agenda só o próximo evento necessário."""
+        # Encaixar no alvo (a diferença restante é invisível)
+        self.current_state.values[LERP_FIELDS] = self.target_state.values[LERP_FIELDS]
+        self.repaint_changed()
+
+        deadlines = [self.next_float_change()]
+        if self.state_name not in NO_BLINK_STATES:
+            deadlines.append(self.blink_timer)
+        if self.state_name != "sleeping":
+            deadlines.append(self.last_activity_time + self.auto_sleep_timeout - time.time())
+        if self.state_name in PARTICLE_STATES:
+            deadlines.append(self.particle_cooldown)
+        if self.timeline:
+            deadlines.append(self.keyframe_end - self.anim_time)
+
+        self.timer.stop()
+        self.parked = True
+        self.park_time = time.perf_counter()
+        self.wake_timer.start(math.ceil(max(min(deadlines), self.dt) * 1000))
+
+    def float_offset(self, t: float, state_name: Optional[str] = None) -> float:
+        """Deslocamento vertical da flutuação no instante t da animação."""
+        speed, amplitude = FLOAT_CYCLES.get(state_name or self.state_name, DEFAULT_FLOAT_CYCLE)
+        return math.sin(t * speed) * amplitude
+
+    def next_float_change(self) -> float:
+        """Segundos até a flutuação mudar de pixel (próxima amostra necessária)."""
+        current = round(self.float_offset(self.anim_time))
+        max_frames = self.current_fps * 5
+        for frames in range(1, max_frames):
+            if round(self.float_offset(self.anim_time + frames * self.dt)) != current:
+                return frames * self.dt
+        return max_frames * self.dt
+
+    def blink_wait(self) -> float:
+        """Espera extra até a piscada, equivalente a ~1.5% de chance por frame."""
+        frames = int(math.log(1.0 - random.random()) / math.log(1.0 - 0.015))
+        return frames * self.dt
+
     def quit_app(self):
+        self.wake_timer.stop()
         self.save_position()
         self.socket_server.stop()
         self.tray.hide()
@@ -473,7 +2043,37 @@ class PipFace(QWidget):
     # COMANDOS
     # -------------------------------------------------------------------------
     def handle_command(self, cmd: dict):
-        """Processa comandos recebidos via socket."""
+        """Processa comandos recebidos via socket e confirma os que pediram ack."""
+        self.apply_command(cmd)
+        if "_acks" in cmd:
+            self.ack_channel.applied(cmd["_acks"], self.state_name)
+
+    def apply_command(self, cmd: dict):
+        """Aplica um comando (ou lote) ao estado da face."""
+        # Leituras (estatísticas, consultas, confirmações de retransmissões) não
+        # contam como atividade (não acordam a face)
+        if "stats" in cmd:
+            self._send_stats()
+        for target, query in cmd.get("_queries", ()):
+            self.answer_query(target, query)
+        for target, events, lease in cmd.get("_subscriptions", ()):
+            self.subscriptions.subscribe(target, events, lease)
+        if cmd.keys() & {"stats", "_queries", "_subscriptions", "_acks"} and not cmd.keys() & {
+            "state", "emotion", "amplitude", "particle", "particles", "timeline", "timelines"
+        }:
+            return
+
+        # Reafirmar o estado atual (ex.: heartbeat de um cliente) é no-op: não
+        # acorda a face, não reinicia o timer de inatividade nem derruba o loop
+        requested = cmd.get("emotion", cmd.get("state"))
+        if requested == self.state_name and cmd.keys() <= {"state", "emotion", "source", "_acks"}:
+            if CONFIG["arbitration"]:
+                self.request_state(requested, cmd.get("source"))  # Conta o no-op e descarta o adiado
+            return
+
+        self.resume_animation()
+        self.stop_loop()
+
         # Resetar timer de inatividade quando receber qualquer comando
         self.last_activity_time = time.time()
         
@@ -481,63 +2081,290 @@ class PipFace(QWidget):
         if self.state_name == "sleeping":
             self.set_state("idle")
         
-        if "state" in cmd:
-            self.set_state(cmd["state"])
-
-        if "amplitude" in cmd:
-            self.speech_amplitude = float(cmd["amplitude"])
-
-        if "emotion" in cmd:
-            self.set_state(cmd["emotion"])
+        # Estado explícito (se vencer a arbitragem) vence a timeline em andamento
+        if requested is not None:
+            self.request_state(requested, cmd.get("source"))
+
+        amplitude = cmd.get("amplitude")
+        if isinstance(amplitude, (int, float)) and math.isfinite(amplitude):
+            amplitude = float(amplitude)
+            if amplitude != self.speech_amplitude:
+                self.amplitude_changes.append(time.perf_counter())
+            self.speech_amplitude = amplitude
+            self.update_fps()
 
         if "particle" in cmd:
             self.emit_particle(cmd["particle"])
-        
-        # Enviar feedback de confirmação
-        self._send_feedback(cmd)
 
-    def set_state(self, state_name: str):
+        # Lote: partículas acumuladas ({tipo: quantidade})
+        for particle_type, count in particle_counts(cmd.get("particles")).items():
+            self.emit_particle(particle_type, count)
+
+        if "timeline" in cmd:
+            self.start_timeline(cmd["timeline"], cmd.get("mode", "replace"), cmd.get("source"))
+        for timeline in cmd.get("timelines", ()):
+            self.start_timeline(timeline["timeline"], timeline["mode"], timeline.get("source"))
+
+    # -------------------------------------------------------------------------
+    # TIMELINE
+    # -------------------------------------------------------------------------
+    def start_timeline(self, keyframes: list, mode: str = "replace", source=None):
+        """Agenda uma sequência de keyframes no relógio da animação.
+
+        Cada keyframe aplica state/amplitude/particle ao começar e dura
+        `duration` segundos até o próximo (o último fica valendo). Com
+        `easing`, a transição para o estado dura `transition` segundos.
+        Os estados passam pela arbitragem com o `source` da timeline.
+
+        Os keyframes são validados aqui (keyframe com campo inválido é
+        descartado): o tick só aplica valores já convertidos.
+
+        Preempção (mode):
+            replace - cancela a timeline em andamento e começa agora (padrão)
+            queue   - começa quando a timeline em andamento terminar
+            if_idle - descartada se já houver uma timeline em andamento
+        Um comando state/emotion avulso que vence a arbitragem cancela a timeline.
+        """
+        if not isinstance(mode, str) or mode not in TIMELINE_MODES or not isinstance(keyframes, list):
+            print(f"Timeline inválida (mode={mode!r})")
+            return
+
+        parsed = []
+        for keyframe in keyframes[:CONFIG["timeline_max_keyframes"]]:
+            keyframe = self.parse_keyframe(keyframe)
+            if keyframe is None:
+                continue
+            keyframe["source"] = source
+            parsed.append(keyframe)
+        if len(parsed) < len(keyframes):
+            print(f"Timeline: {len(keyframes) - len(parsed)} keyframe(s) inválido(s) descartado(s)")
+
+        running = bool(self.timeline) or self.keyframe_end > self.anim_time
+        if mode == "if_idle" and running:
+            return
+        if mode == "queue" and running:
+            self.timeline.extend(parsed)
+            return
+
+        self.cancel_timeline()
+        self.timeline.extend(parsed)
+        self.advance_timeline()
+
+    @staticmethod
+    def parse_keyframe(keyframe) -> Optional[dict]:
+        """Keyframe com os campos já convertidos; None se algum for inválido."""
+        if not isinstance(keyframe, dict):
+            return None
+        parsed = {}
+        try:
+            duration = float(keyframe.get("duration", 0.0))
+            transition = float(keyframe.get("transition", CONFIG["timeline_transition"]))
+            if not (math.isfinite(duration) and math.isfinite(transition)):
+                return None
+            parsed["duration"] = max(0.0, duration)
+            parsed["transition"] = max(0.0, transition)
+            if "amplitude" in keyframe:
+                amplitude = float(keyframe["amplitude"])
+                if not math.isfinite(amplitude):
+                    return None
+                parsed["amplitude"] = amplitude
+            if "particle" in keyframe:
+                parsed["particle"] = keyframe["particle"]
+                parsed["count"] = min(max(int(keyframe.get("count", 3)), 0), CONFIG["particle_burst_max"])
+        except (TypeError, ValueError, OverflowError):
+            return None
+        if "particle" in parsed and not isinstance(parsed["particle"], str):
+            return None
+        if "state" in keyframe:
+            if not isinstance(keyframe["state"], str):
+                return None
+            parsed["state"] = keyframe["state"]
+        easing = keyframe.get("easing")
+        if easing is not None and not (isinstance(easing, str) and easing in EASINGS):
+            return None
+        parsed["easing"] = easing
+        return parsed
+
+    def cancel_timeline(self):
+        self.timeline.clear()
+        self.keyframe_end = self.anim_time
+        self.ease = None
+
+    def advance_timeline(self):
+        """Aplica os keyframes cujo horário chegou (no horário exato, sem deriva)."""
+        while self.timeline and self.anim_time >= self.keyframe_end:
+            keyframe = self.timeline.popleft()
+            self.apply_keyframe(keyframe, self.keyframe_end)
+            self.keyframe_end += keyframe["duration"]
+
+    def apply_keyframe(self, keyframe: dict, start: float):
+        """Aplica um keyframe já validado por parse_keyframe (nada aqui pode levantar)."""
+        if "state" in keyframe and self.request_state(keyframe["state"], keyframe["source"], timeline=True):
+            easing = EASINGS.get(keyframe["easing"])
+            if easing is not None and keyframe["transition"] > 0:
+                start_values = self.current_state.values[LERP_FIELDS].copy()
+                self.ease = (start_values, easing, start, keyframe["transition"])
+            else:
+                self.ease = None
+        if "amplitude" in keyframe:
+            self.speech_amplitude = keyframe["amplitude"]
+        if "particle" in keyframe:
+            self.emit_particle(keyframe["particle"], keyframe["count"])
+
+    def request_state(self, state_name: str, source=None, timeline: bool = False) -> bool:
+        """Estado pedido por comando (ou keyframe): passa pela arbitragem antes de set_state.
+
+        Um pedido avulso que é aplicado cancela a timeline em andamento; um
+        keyframe que perde a arbitragem não fica adiado. Retorna se aplicou.
+        """
+        if not isinstance(state_name, str) or state_name not in EXPRESSIONS:
+            return False
+        priority = source_priority(source)
+        decision = StateArbiter.APPLY
+        if CONFIG["arbitration"]:
+            decision = self.arbiter.decide(state_name, priority, time.perf_counter(), defer=not timeline)
+        if decision == StateArbiter.DEFER and not timeline:
+            self.schedule_deferred_state()
+        if decision != StateArbiter.APPLY:
+            return False
+        if not timeline:
+            self.cancel_timeline()
+        self.set_state(state_name, priority)
+        return True
+
+    def schedule_deferred_state(self):
+        left = self.arbiter.dwell_left(time.perf_counter())
+        self.dwell_timer.start(max(0, math.ceil(left * 1000)))
+
+    def apply_deferred_state(self):
+        """Fim do dwell: aplica o último estado adiado."""
+        if self.arbiter.deferred is None:
+            return
+        if self.arbiter.dwell_left(time.perf_counter()) > 0:
+            self.schedule_deferred_state()
+            return
+        state_name, priority = self.arbiter.deferred
+        self.cancel_timeline()
+        self.set_state(state_name, priority)
+
+    def set_state(self, state_name: str, priority: Optional[int] = None):
         """Define o estado alvo para interpolação."""
         if state_name in EXPRESSIONS:
-            old_state = self.state_name
+            self.resume_animation()
+            self.stop_loop()
+            if state_name != self.arbiter.state_name:
+                if priority is None:
+                    priority = CONFIG["source_priority_default"]
+                self.arbiter.held(state_name, priority, time.perf_counter())
             self.state_name = state_name
-            expr = EXPRESSIONS[state_name]
+            self.subscriptions.publish("state", {"state": state_name})
+            self.subscriptions.publish("sleep", {"sleeping": state_name == "sleeping"})
             # Copiar valores da expressão para o target
-            for attr in vars(expr):
-                if not attr.startswith("_"):
-                    setattr(self.target_state, attr, getattr(expr, attr))
+            self.target_state.values[:] = EXPRESSIONS[state_name].values
 
-            # Ajustar FPS se mudou de categoria
-            if (old_state in LOW_FPS_STATES) != (state_name in LOW_FPS_STATES):
-                self.update_fps()
+            # Ajustar FPS já (transição nova pede mais frames)
+            self.update_fps()
 
     def emit_particle(self, particle_type: str, count: int = 3):
-        """Emite partículas."""
+        """Emite partículas (tipo ou quantidade inválidos são ignorados)."""
+        if not isinstance(particle_type, str):
+            return
+        try:
+            count = int(count)
+        except (TypeError, ValueError, OverflowError):
+            return
+        self.resume_animation()
+        self.stop_loop()
         w, h = self.width(), self.height()
         self.particles.emit(w // 2, h // 3, particle_type, count)
+        self.subscriptions.publish_particles(particle_type, count)
     
-    def _send_feedback(self, cmd: dict):
-        """Envia feedback de confirmação do comando."""
-        try:
-            feedback = {
-                "status": "✅ Animação ativa",
+    def stats_snapshot(self) -> dict:
+        """Estatísticas de frame/paint, FPS, socket e filas."""
+        return {
+            "stats": self.frame_stats.summary(),
+            "state": self.state_name,
+            "target_fps": self.current_fps,
+            "parked": self.parked,
+            "particles": len(self.particles),
+            "queue": self.queue_depth(),
+            "socket": self.socket_server.stats(),
+            "acks": self.ack_channel.stats(),
+            "subscriptions": self.subscriptions.stats(),
+            "arbitration": self.arbiter.stats(),
+            "amplitude_stream": self.amplitude_stream.stats(),
+            "timestamp": time.time()
+        }
+
+    def queue_depth(self) -> dict:
+        """Trabalho pendente: keyframes agendados e confirmações por enviar."""
+        return {"timeline": len(self.timeline), "acks": len(self.ack_channel.pending)}
+
+    def answer_query(self, target: tuple, query):
+        """Responde uma consulta direto ao remetente (mesmo socket do comando)."""
+        if query == "state":
+            answer = {
                 "state": self.state_name,
-                "command": cmd.get("state", "unknown"),
-                "timestamp": time.time()
+                "current": self.current_state.as_dict(),
+                "target": self.target_state.as_dict(),
+                "target_fps": self.current_fps,
+                "parked": self.parked,
+                "stats": self.frame_stats.summary(),
+                "particles": len(self.particles),
+                "queue": self.queue_depth(),
             }
-            
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.sendto(json.dumps(feedback).encode(), ("127.0.0.1", 5556))
-            sock.close()
+        elif query == "stats":
+            answer = self.stats_snapshot()
+        elif query == "config":
+            answer = {"config": CONFIG}
+        else:
+            answer = {"error": f"consulta desconhecida: {query}"}
+        answer["query"] = query
+        try:
+            send_reply(target, json.dumps(answer).encode())
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Erro respondendo consulta {query!r}: {e}")
+
+    def _send_stats(self):
+        """Envia estatísticas de frame/paint pela porta de feedback."""
+        try:
+            stats = self.stats_snapshot()
+            self.feedback_socket.sendto(json.dumps(stats).encode(), ("127.0.0.1", CONFIG["feedback_port"]))
         except Exception as e:
-            print(f"Erro ao enviar feedback: {e}")
+            print(f"Erro ao enviar estatísticas: {e}")
+
+    def log_frame_stats(self):
+        """Loga o resumo das estatísticas de frame (chamado periodicamente)."""
+        stats = self.frame_stats.summary()
+        frame, paint = stats["frame_ms"], stats["paint_ms"]
+        print(
+            f"[stats] fps={stats['fps']} (alvo {self.current_fps}) "
+            f"frame p50/p95/p99/max={frame.get('p50')}/{frame.get('p95')}/{frame.get('p99')}/{frame.get('max')}ms "
+            f"paint p50/p95/p99/max={paint.get('p50')}/{paint.get('p95')}/{paint.get('p99')}/{paint.get('max')}ms "
+            f"perdidos={stats['dropped']}"
+        )
 
     # -------------------------------------------------------------------------
     # ANIMAÇÃO
     # -------------------------------------------------------------------------
     def update_animation(self):
+        # Passo pelo tempo real decorrido (timer atrasado não deixa a animação lenta)
+        now = time.perf_counter()
+        dt = now - self.last_frame_time
+        self.last_frame_time = now
+        self.frame_stats.record_frame(dt, self.dt)
+
+        log_interval = CONFIG["frame_stats_log_interval"]
+        if log_interval and now - self.last_stats_log >= log_interval:
+            self.last_stats_log = now
+            self.log_frame_stats()
+
+        self.step(min(dt, CONFIG["max_frame_dt"]))
+
+    def step(self, dt: float):
+        """Avança a animação dt segundos e agenda a repintura do que mudou."""
         self.tick += 1
-        dt = self.dt
+        self.anim_time += dt
 
         # Verificar inatividade - dormir após 10 minutos
         if self.state_name != "sleeping":
@@ -545,37 +2372,38 @@ class PipFace(QWidget):
             if elapsed > self.auto_sleep_timeout:
                 self.set_state("sleeping")
 
-        # Interpolar estado atual para o alvo
-        lerp_speed = 8.0 * dt
-        for attr in ["eye_open", "eye_size", "pupil_x", "pupil_y", "pupil_size",
-                     "brow_left_y", "brow_right_y", "brow_left_angle", "brow_right_angle",
-                     "mouth_open", "mouth_width", "mouth_curve", "blush_alpha", "shake"]:
-            current = getattr(self.current_state, attr)
-            target = getattr(self.target_state, attr)
-            setattr(self.current_state, attr, lerp(current, target, lerp_speed))
-
-        # Interpolar cor
-        current_color = self.current_state.face_color
-        target_color = self.target_state.face_color
-        self.current_state.face_color = lerp_color(current_color, target_color, lerp_speed)
+        self.advance_timeline()
+        self.update_fps(dt)
+
+        # Modo baixo consumo: só avança o loop pré-renderizado
+        if self.loop is not None and self.play_loop(dt):
+            return
+
+        # Interpolar estado atual (inclusive a cor) para o alvo
+        current = self.current_state.values[LERP_FIELDS]
+        target = self.target_state.values[LERP_FIELDS]
+        if self.ease is not None:
+            # Transição de keyframe com curva e duração fixas
+            start, easing, t0, length = self.ease
+            progress = (self.anim_time - t0) / length
+            if progress >= 1:
+                self.ease = None
+                current[:] = target
+            else:
+                current[:] = start + (target - start) * easing(max(progress, 0.0))
+        else:
+            lerp_speed = min(max(8.0 * dt, 0), 1)
+            current += (target - current) * lerp_speed
 
         # Flutuação (sempre ativa)
-        if self.state_name == "sleeping":
-            self.current_state.float_y = math.sin(self.tick * 0.02) * 12
-        elif self.state_name == "speaking":
-            self.current_state.float_y = math.sin(self.tick * 0.08) * 6
-        elif self.state_name == "working":
-            self.current_state.float_y = math.sin(self.tick * 0.03) * 3  # Bem sutil
-        else:
-            self.current_state.float_y = math.sin(self.tick * 0.04) * 4
+        self.current_state.float_y = self.float_offset(self.anim_time)
 
-        # Piscada
-        if self.state_name not in ["sleeping", "happy", "error"]:
+        # Piscada (prazo sorteado com antecedência para o timer poder parar)
+        if self.state_name not in NO_BLINK_STATES:
             self.blink_timer -= dt
             if self.blink_timer <= 0:
-                if random.random() < 0.015:  # ~1.5% chance por frame
-                    self.blink_duration = 0.15
-                    self.blink_timer = random.uniform(3.0, 6.0)
+                self.blink_duration = 0.15
+                self.blink_timer = random.uniform(3.0, 6.0) + self.blink_wait()
 
             if self.blink_duration > 0:
                 self.blink_duration -= dt
@@ -583,26 +2411,26 @@ class PipFace(QWidget):
 
         # Fala - modulação da boca (50% mais rápida)
         if self.state_name == "speaking":
-            if self.speech_amplitude > 0:
+            streamed = self.amplitude_stream.sample(time.perf_counter())
+            if streamed is not None:
+                # Stream de áudio: a boca segue a amostra interpolada no instante do frame
+                self.current_state.mouth_open = streamed * 0.8
+            elif self.speech_amplitude > 0:
                 self.current_state.mouth_open = 0.2 + self.speech_amplitude * 0.6
             else:
-                if self.tick % 5 == 0:  # Era 8, agora 5 (50% mais rápido)
+                self.speech_timer -= dt
+                if self.speech_timer <= 0:  # 6x por segundo (50% mais rápido)
+                    self.speech_timer = 1 / 6
                     self.target_state.mouth_open = random.uniform(0.2, 0.7)
 
         # Pupilas SEMPRE seguem o mouse ("o que esse arrombado tá fazendo?")
-        if self.state_name in ["idle", "speaking"]:
-            global_mouse = QCursor.pos()
-            local_mouse = self.mapFromGlobal(global_mouse)
-            center = QPointF(self.width() / 2, self.height() / 3)
-            delta = QPointF(local_mouse) - center
-            max_offset = 200
-            self.target_state.pupil_x = max(-1, min(1, delta.x() / max_offset))
-            self.target_state.pupil_y = max(-1, min(1, delta.y() / max_offset))
+        if self.state_name in MOUSE_FOLLOW_STATES:
+            self.follow_mouse()
 
         # Working: olhos focados no centro com leve variação
         if self.state_name == "working":
-            self.target_state.pupil_x = math.sin(self.tick * 0.02) * 0.1
-            self.target_state.pupil_y = 0.1 + math.sin(self.tick * 0.015) * 0.05
+            self.target_state.pupil_x = math.sin(self.anim_time * 0.6) * 0.1
+            self.target_state.pupil_y = 0.1 + math.sin(self.anim_time * 0.45) * 0.05
 
         # Partículas automáticas (SÓ em estados específicos, NÃO no idle)
         if self.state_name in PARTICLE_STATES:
@@ -615,38 +2443,80 @@ class PipFace(QWidget):
         # Atualizar partículas
         self.particles.update(dt)
 
-        self.update()
-
-    # -------------------------------------------------------------------------
-    # DESENHO
-    # -------------------------------------------------------------------------
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
+        # Loop primeiro (low_power_loops vence park_when_idle); estaciona só sem loop
+        if not self.try_loop():
+            if self.can_park():
+                self.park()
+            else:
+                self.repaint_changed()
+
+    def follow_mouse(self):
+        """Aponta as pupilas (alvo) para o cursor."""
+        global_mouse = QCursor.pos()
+        local_mouse = self.mapFromGlobal(global_mouse)
+        center = QPointF(self.width() / 2, self.height() / 3)
+        delta = QPointF(local_mouse) - center
+        max_offset = 200
+        self.target_state.pupil_x = max(-1, min(1, delta.x() / max_offset))
+        self.target_state.pupil_y = max(-1, min(1, delta.y() / max_offset))
+
+    def repaint_changed(self):
+        """Repinta só os elementos cuja geometria/aparência mudou desde o último frame."""
+        previous = self.layout
+        self.layout = layout = self.compute_layout()
+        self.request_repaint(self.layout_changes(previous, layout))
+
+    def request_repaint(self, rects: list):
+        """Agenda a repintura dos retângulos (mais o contorno de debug anterior)."""
+        dirty = QRegion()
+        for rect in rects:
+            dirty = dirty.united(rect)
+        if self.debug_dirty:
+            # Apagar o contorno desenhado no frame anterior
+            for rect in self.dirty_rects:
+                dirty = dirty.united(rect)
+
+        if not dirty.isEmpty():
+            self.dirty_rects = rects
+            self.update(dirty)
+
+    def layout_changes(self, previous: Optional[dict], layout: dict) -> list:
+        """Retângulos que precisam ser repintados para ir de `previous` a `layout`."""
+        if previous is None or previous["offset"] != layout["offset"] or previous["size"] != layout["size"]:
+            # A face inteira se moveu (flutuação/shake) ou a janela mudou
+            return [QRect(0, 0, *layout["size"])]
+
+        rects = []
+        for name in ("face", "eyes", "brows", "mouth", "particles"):
+            old_key, old_rect = previous[name]
+            new_key, new_rect = layout[name]
+            if old_key != new_key:
+                rects.extend(r for r in (old_rect, new_rect) if not r.isEmpty())
+        return rects
+
+    def compute_layout(self, state: Optional[FaceState] = None,
+                       particles: Optional[ParticleSystem] = None) -> dict:
+        """Geometria de cada elemento do frame atual, em coordenadas da janela.
+
+        Cada elemento vira (chave, retângulo): a chave muda sempre que o
+        desenho do elemento muda, e o retângulo cobre tudo o que ele pinta.
+        Por padrão usa o estado e as partículas ao vivo.
+        """
         w, h = self.width(), self.height()
-        state = self.current_state
+        state = state or self.current_state
+        particles = particles or self.particles
 
-        # Offset de flutuação e shake
-        float_y = state.float_y
+        # Offset de flutuação e shake (em pixels inteiros)
         shake_x = random.uniform(-state.shake, state.shake) if state.shake > 0.1 else 0
         shake_y = random.uniform(-state.shake, state.shake) if state.shake > 0.1 else 0
+        offset_x = round(shake_x)
+        offset_y = round(state.float_y + shake_y)
+        offset = QPoint(offset_x, offset_y)
 
-        offset_x = shake_x
-        offset_y = float_y + shake_y
-
-        # === FUNDO (FACE) ===
-        face_rect = QRectF(10 + offset_x, 10 + offset_y, w - 20, h - 20)
-        painter.setBrush(QColor(*state.face_color[:3]))
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawRoundedRect(face_rect, 40, 40)
-
-        # === BLUSH ===
-        if state.blush_alpha > 0.05:
-            blush_color = QColor(*CONFIG["blush_color"][:3], int(state.blush_alpha * 100))
-            painter.setBrush(blush_color)
-            painter.drawEllipse(QPointF(w * 0.2 + offset_x, h * 0.55 + offset_y), 30, 20)
-            painter.drawEllipse(QPointF(w * 0.8 + offset_x, h * 0.55 + offset_y), 30, 20)
+        # === FUNDO (FACE) + BLUSH ===
+        blush_alpha = int(state.blush_alpha * 100) if state.blush_alpha > 0.05 else 0
+        face_color = state.face_color
+        face = ((face_color, blush_alpha), QRect(0, 0, w, h))
 
         # === OLHOS ===
         eye_y = h * 0.35 + offset_y
@@ -657,116 +2527,412 @@ class PipFace(QWidget):
         eye_height = eye_base_radius * state.eye_open
         eye_height = max(eye_height, 4)
 
-        painter.setBrush(QColor(*CONFIG["eye_color"]))
-
         if state.eye_open > 0.2:
             # Olhos abertos (QUADRADOS - estilo Minecraft)
             eye_w = eye_base_radius * 2
             eye_h = eye_height * 2
-            painter.drawRect(
-                int(eye_left_x - eye_base_radius), int(eye_y - eye_height),
-                int(eye_w), int(eye_h)
-            )
-            painter.drawRect(
-                int(eye_right_x - eye_base_radius), int(eye_y - eye_height),
-                int(eye_w), int(eye_h)
+            eye_rects = tuple(
+                (int(ex - eye_base_radius), int(eye_y - eye_height), int(eye_w), int(eye_h))
+                for ex in (eye_left_x, eye_right_x)
             )
 
             # Pupilas (quadradas também)
+            pupil_rects = ()
             if state.eye_open > 0.3:
                 pupil_size = eye_base_radius * state.pupil_size * 0.8
                 pupil_offset_x = state.pupil_x * eye_base_radius * 0.4
                 pupil_offset_y = state.pupil_y * eye_height * 0.3
-
-                painter.setBrush(QColor(*CONFIG["pupil_color"]))
-                painter.drawRect(
-                    int(eye_left_x + pupil_offset_x - pupil_size / 2),
-                    int(eye_y + pupil_offset_y - pupil_size / 2),
-                    int(pupil_size), int(pupil_size)
-                )
-                painter.drawRect(
-                    int(eye_right_x + pupil_offset_x - pupil_size / 2),
-                    int(eye_y + pupil_offset_y - pupil_size / 2),
-                    int(pupil_size), int(pupil_size)
+                pupil_rects = tuple(
+                    (int(ex + pupil_offset_x - pupil_size / 2),
+                     int(eye_y + pupil_offset_y - pupil_size / 2),
+                     int(pupil_size), int(pupil_size))
+                    for ex in (eye_left_x, eye_right_x)
                 )
+
+            eyes_key = ("open", eye_rects, pupil_rects)
+            eyes_rect = QRect()
+            for rect in eye_rects + pupil_rects:
+                eyes_rect = eyes_rect.united(QRect(*rect))
         else:
-            # Olhos fechados
-            if self.state_name == "error":
-                # Olhos X
-                pen = QPen(QColor(*CONFIG["eye_color"]), 5)
-                painter.setPen(pen)
-                size = 20
-                for ex in [eye_left_x, eye_right_x]:
-                    painter.drawLine(
-                        int(ex - size), int(eye_y - size),
-                        int(ex + size), int(eye_y + size)
-                    )
-                    painter.drawLine(
-                        int(ex + size), int(eye_y - size),
-                        int(ex - size), int(eye_y + size)
-                    )
-            elif self.state_name == "happy":
-                # Olhos ^ ^
-                pen = QPen(QColor(*CONFIG["eye_color"]), 5)
-                painter.setPen(pen)
-                for ex in [eye_left_x, eye_right_x]:
-                    path = QPainterPath()
-                    path.moveTo(ex - 20, eye_y + 5)
-                    path.quadTo(ex, eye_y - 15, ex + 20, eye_y + 5)
-                    painter.drawPath(path)
-            else:
-                # Linha fechada
-                pen = QPen(QColor(*CONFIG["eye_color"]), 4)
-                painter.setPen(pen)
-                painter.drawLine(int(eye_left_x - 20), int(eye_y), int(eye_left_x + 20), int(eye_y))
-                painter.drawLine(int(eye_right_x - 20), int(eye_y), int(eye_right_x + 20), int(eye_y))
+            # Olhos fechados: estilo depende do estado (X, ^ ^ ou linha)
+            style = self.state_name if self.state_name in ("error", "happy") else "line"
+            eyes_key = ("closed", style, eye_left_x, eye_right_x, eye_y)
+            eyes_rect = QRect(
+                int(eye_left_x) - 24, int(eye_y) - 24,
+                int(eye_right_x - eye_left_x) + 48, 48
+            )
 
         # === SOBRANCELHAS ===
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(QColor(*CONFIG["brow_color"]))
-
-        brow_y_base = h * 0.22 + offset_y
-        brow_width = 45
-        brow_height = 8
-
-        for i, (brow_x, brow_y_offset, brow_angle) in enumerate([
-            (eye_left_x, state.brow_left_y, state.brow_left_angle),
-            (eye_right_x, state.brow_right_y, state.brow_right_angle)
-        ]):
-            painter.save()
-            brow_y = brow_y_base - brow_y_offset * 20
-            painter.translate(brow_x, brow_y)
-            angle = brow_angle if i == 0 else -brow_angle
-            painter.rotate(angle)
-            painter.drawRoundedRect(
-                int(-brow_width / 2), int(-brow_height / 2),
-                brow_width, brow_height, 4, 4
-            )
-            painter.restore()
+        brows_key, brow_origin, brow_size = self.brow_geometry(w, h, state)
+        brows_rect = QRectF(brow_origin + QPointF(offset), brow_size).toAlignedRect()
 
         # === BOCA (QUADRADA - estilo Minecraft) ===
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(QColor(*CONFIG["eye_color"]))
-
         mouth_x = w / 2 + offset_x
         mouth_y = h * 0.68 + offset_y
         mouth_w = 78 * state.mouth_width
         mouth_h = 13 + state.mouth_open * 52
+        if state.mouth_open <= 0.1:
+            mouth_h = max(4, int(8 + state.mouth_curve * 4))
+        mouth_key = (int(mouth_x - mouth_w / 2), int(mouth_y), int(mouth_w), int(mouth_h))
+
+        # === PARTÍCULAS === (mudam todo frame enquanto houver alguma viva)
+        particles_key = particles.updates if len(particles) else None
+
+        return {
+            "size": (w, h),
+            "state": state,
+            "particle_system": particles,
+            "offset": offset,
+            "face": face,
+            "eyes": (eyes_key, eyes_rect.adjusted(-2, -2, 2, 2)),
+            "brows": (brows_key, brows_rect.adjusted(-1, -1, 1, 1)),
+            "mouth": (mouth_key, QRect(*mouth_key).adjusted(-2, -2, 2, 2)),
+            "particles": (particles_key, particles.bounds()),
+        }
 
-        if state.mouth_open > 0.1:
-            painter.drawRect(
-                int(mouth_x - mouth_w / 2), int(mouth_y),
-                int(mouth_w), int(mouth_h)
-            )
+    # -------------------------------------------------------------------------
+    # LOOPS PRÉ-RENDERIZADOS
+    # -------------------------------------------------------------------------
+    def current_loop_key(self) -> tuple:
+        """Identifica o loop que reproduz o estado alvo atual."""
+        return (
+            self.state_name, self.width(), self.height(), self.devicePixelRatioF(),
+            tuple(np.round(self.target_state.values[LERP_FIELDS], 3).tolist()),
+        )
+
+    def try_loop(self) -> bool:
+        """Entra no loop pré-renderizado se possível (fazendo o bake aos poucos)."""
+        if not CONFIG["low_power_loops"] or self.state_name not in LOW_FPS_STATES:
+            return False
+        if not self.is_converged():
+            return False
+
+        key = self.current_loop_key()
+        if key not in self.loops:
+            if self.loop_baker_key != key:
+                self.loop_baker = self.bake_loop(key)
+                self.loop_baker_key = key
+            for _ in range(CONFIG["loop_bake_frames_per_tick"]):
+                if next(self.loop_baker, StopIteration) is StopIteration:
+                    self.loop_baker = self.loop_baker_key = None
+                    break
+            return False
+
+        loop = self.loops[key]
+        if loop is None:
+            return False
+        self.loops.move_to_end(key)
+
+        # Alinhar a emissão ao vivo com a do loop e entrar num quadro sem
+        # partículas nos dois lados (nada some nem aparece do nada)
+        if loop.emit_interval:
+            self.particle_cooldown = loop.next_emission(self.anim_time)
+        frame = loop.frame_at(self.anim_time)
+        if len(self.particles) or loop.particle_counts[frame]:
+            return False
+
+        self.loop, self.loop_key, self.loop_frame = loop, key, frame
+        self.request_repaint([self.rect()])
+        return True
+
+    def play_loop(self, dt: float) -> bool:
+        """Avança o loop; False quando algo precisa de renderização ao vivo."""
+        # Piscada chegando: volta ao vivo para desenhar
+        if self.state_name not in NO_BLINK_STATES:
+            if self.blink_timer - dt <= 0:
+                return self.stop_loop()
+            self.blink_timer -= dt
+
+        # Mouse mexeu: as pupilas vão mudar
+        if self.state_name in MOUSE_FOLLOW_STATES:
+            self.follow_mouse()
+            if self.current_loop_key() != self.loop_key:
+                return self.stop_loop()
+
+        loop = self.loop
+        self.current_state.float_y = self.float_offset(self.anim_time)
+        frame = loop.frame_at(self.anim_time)
+        if frame != self.loop_frame:
+            if frame == (self.loop_frame + 1) % loop.frame_count:
+                rects = loop.dirty[frame]
+            else:
+                rects = [self.rect()]
+            self.loop_frame = frame
+            self.request_repaint(rects)
+        return True
+
+    def stop_loop(self) -> bool:
+        """Volta para a renderização ao vivo (sempre retorna False)."""
+        if self.loop is not None:
+            if self.loop.emit_interval:
+                self.particle_cooldown = self.loop.next_emission(self.anim_time)
+            self.loop = self.loop_key = None
+            self.layout = None  # Próximo frame repinta tudo
+        return False
+
+    def bake_loop(self, key: tuple):
+        """Pré-renderiza um período do estado atual, um quadro por next()."""
+        state_name = self.state_name
+        w, h = self.width(), self.height()
+        dpr = self.devicePixelRatioF()
+        speed, amplitude = FLOAT_CYCLES.get(state_name, DEFAULT_FLOAT_CYCLE)
+        period = 2 * math.pi / speed
+        emitter = PARTICLE_STATES.get(state_name)
+
+        # Com partículas todo quadro é único: o orçamento limita o FPS do loop
+        fps = self.current_fps
+        if emitter:
+            frame_bytes = math.ceil(w * dpr) * math.ceil(h * dpr) * 4
+            fps = min(fps, CONFIG["loop_cache_max_mb"] * 1024 * 1024 / frame_bytes / period)
+        if fps < CONFIG["loop_cache_min_fps"]:
+            self.store_loop(key, None)  # Não compensa: fica ao vivo
+            return
+
+        frame_count = max(1, round(period * fps))
+        dt = period / frame_count
+        if emitter:
+            particle_type, cooldown, count = emitter
+            emissions = max(1, round(period / cooldown))  # Número inteiro por período
+            emit_interval = period / emissions
+            capacity = frame_count
         else:
-            closed_h = max(4, int(8 + state.mouth_curve * 4))
-            painter.drawRect(
-                int(mouth_x - mouth_w / 2), int(mouth_y),
-                int(mouth_w), closed_h
-            )
+            emit_interval = None
+            capacity = 2 * math.ceil(amplitude) + 3  # Um quadro por pixel de flutuação
+        loop = BakedLoop(w, h, dpr, period, frame_count, capacity, emit_interval)
+
+        state = FaceState()
+        state.values[:] = self.target_state.values
+        particles = ParticleSystem(capacity=256)
+        region = QRegion(0, 0, w, h)
+
+        # Começar antes do loop para as partículas de t=0 já estarem no ar
+        warmup = math.ceil(PARTICLE_MAX_LIFE / dt) + 1 if emitter else 0
+        next_emission = math.floor(-warmup * dt / emit_interval) if emitter else 0
+        unique = {}
+        first = previous = None
+
+        for i in range(-warmup, frame_count):
+            t = i * dt
+            if emitter:
+                while next_emission * emit_interval <= t:
+                    # Mesma semente a cada período: o loop emenda sem costura
+                    particles.rng = np.random.default_rng(next_emission % emissions)
+                    particles.emit(w // 2, h // 3, particle_type, count)
+                    next_emission += 1
+                particles.update(dt)
+            if i < 0:
+                continue
+
+            state.float_y = self.float_offset(t, state_name)
+            layout = self.compute_layout(state, particles)
+            signature = None
+            if not len(particles):
+                offset = layout["offset"]
+                signature = (offset.x(), offset.y()) + tuple(
+                    layout[name][0] for name in ("face", "eyes", "brows", "mouth")
+                )
+
+            index = unique.get(signature) if signature is not None else None
+            if index is None:
+                index, image = loop.new_image()
+                painter = QPainter(image)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+                self.paint_layout(painter, layout, region)
+                painter.end()
+                if signature is not None:
+                    unique[signature] = index
+
+            loop.sequence.append(index)
+            loop.particle_counts.append(len(particles))
+            loop.dirty.append(self.layout_changes(previous, layout))
+            first = first or layout
+            previous = layout
+            yield
+
+        loop.dirty[0] = self.layout_changes(previous, first)  # Emenda do fim com o começo
+        self.store_loop(key, loop)
+
+    def store_loop(self, key: tuple, loop: Optional[BakedLoop]):
+        self.loops[key] = loop
+        while len(self.loops) > CONFIG["loop_cache_loops"]:
+            _, evicted = self.loops.popitem(last=False)
+            if evicted is not None and evicted is not self.loop:
+                evicted.close()
+
+    # -------------------------------------------------------------------------
+    # DESENHO
+    # -------------------------------------------------------------------------
+    def paintEvent(self, event):
+        paint_start = time.perf_counter()
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        if self.loop is not None:
+            # Modo baixo consumo: quadro pré-renderizado
+            loop = self.loop
+            painter.drawImage(QPointF(0, 0), loop.image(loop.sequence[self.loop_frame]))
+        else:
+            if self.layout is None or self.layout["size"] != (self.width(), self.height()):
+                self.layout = self.compute_layout()
+            self.paint_layout(painter, self.layout, event.region())
+
+        # === DEBUG: regiões repintadas ===
+        if self.debug_dirty:
+            painter.setBrush(QColor(0, 255, 0, 40))
+            painter.setPen(QPen(QColor(0, 160, 0), 1))
+            for rect in self.dirty_rects:
+                painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+        painter.end()
+        self.frame_stats.record_paint(time.perf_counter() - paint_start)
+
+    def paint_layout(self, painter: QPainter, layout: dict, region: QRegion):
+        """Desenha a face descrita por `layout` (só o que cruza `region`)."""
+        w, h = layout["size"]
+        state = layout["state"]
+        offset = QPointF(layout["offset"])
+
+        # === FUNDO (FACE) + BLUSH === (camada em cache)
+        face_layer = self.get_face_layer(w, h, state)
+        painter.drawPixmap(QPointF(10, 10) + offset, face_layer)
+
+        # === OLHOS ===
+        eyes_key, eyes_rect = layout["eyes"]
+        if region.intersects(eyes_rect):
+            if eyes_key[0] == "open":
+                _, eye_rects, pupil_rects = eyes_key
+                for rect in eye_rects:
+                    painter.fillRect(*rect, self.colors["eye"])
+                for rect in pupil_rects:
+                    painter.fillRect(*rect, self.colors["pupil"])
+            else:
+                _, style, eye_left_x, eye_right_x, eye_y = eyes_key
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                if style == "error":
+                    # Olhos X
+                    pen = QPen(self.colors["eye"], 5)
+                    painter.setPen(pen)
+                    size = 20
+                    for ex in [eye_left_x, eye_right_x]:
+                        painter.drawLine(
+                            int(ex - size), int(eye_y - size),
+                            int(ex + size), int(eye_y + size)
+                        )
+                        painter.drawLine(
+                            int(ex + size), int(eye_y - size),
+                            int(ex - size), int(eye_y + size)
+                        )
+                elif style == "happy":
+                    # Olhos ^ ^
+                    pen = QPen(self.colors["eye"], 5)
+                    painter.setPen(pen)
+                    for ex in [eye_left_x, eye_right_x]:
+                        path = QPainterPath()
+                        path.moveTo(ex - 20, eye_y + 5)
+                        path.quadTo(ex, eye_y - 15, ex + 20, eye_y + 5)
+                        painter.drawPath(path)
+                else:
+                    # Linha fechada
+                    pen = QPen(self.colors["eye"], 4)
+                    painter.setPen(pen)
+                    painter.drawLine(int(eye_left_x - 20), int(eye_y), int(eye_left_x + 20), int(eye_y))
+                    painter.drawLine(int(eye_right_x - 20), int(eye_y), int(eye_right_x + 20), int(eye_y))
+
+        # === SOBRANCELHAS === (camada em cache)
+        if region.intersects(layout["brows"][1]):
+            brow_layer, brow_origin = self.get_brow_layer(w, h, state)
+            painter.drawPixmap(brow_origin + offset, brow_layer)
+
+        # === BOCA (QUADRADA - estilo Minecraft) ===
+        mouth_key, mouth_rect = layout["mouth"]
+        if region.intersects(mouth_rect):
+            painter.fillRect(*mouth_key, self.colors["eye"])
 
         # === PARTÍCULAS ===
-        self.particles.draw(painter)
+        if region.intersects(layout["particles"][1]):
+            layout["particle_system"].draw(painter)
+
+    def get_face_layer(self, w: int, h: int, state: FaceState) -> QPixmap:
+        """Fundo arredondado + blush, pré-renderizado por cor/alpha."""
+        blush_alpha = int(state.blush_alpha * 100) if state.blush_alpha > 0.05 else 0
+        face_color = state.face_color
+        dpr = self.devicePixelRatioF()
+        key = (w, h, dpr, face_color, blush_alpha)
+
+        def render() -> QPixmap:
+            layer = new_layer(w - 20, h - 20, dpr)
+            painter = QPainter(layer)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.translate(-10, -10)  # Coordenadas da janela
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(*face_color))
+            painter.drawRoundedRect(QRectF(10, 10, w - 20, h - 20), 40, 40)
+            if blush_alpha:
+                painter.setBrush(QColor(*CONFIG["blush_color"][:3], blush_alpha))
+                painter.drawEllipse(QPointF(w * 0.2, h * 0.55), 30, 20)
+                painter.drawEllipse(QPointF(w * 0.8, h * 0.55), 30, 20)
+            painter.end()
+            return layer
+
+        return self.face_cache.get(key, render)
+
+    def brow_geometry(self, w: int, h: int, state: FaceState) -> tuple:
+        """Chave quantizada, origem e tamanho da camada de sobrancelhas.
+
+        A origem é relativa à face sem flutuação/shake.
+        """
+        y_step = CONFIG["brow_y_step"]
+        key = (
+            round(state.brow_left_y / y_step), round(state.brow_right_y / y_step),
+            round(state.brow_left_angle / CONFIG["brow_angle_step"]),
+            round(state.brow_right_angle / CONFIG["brow_angle_step"]),
+        )
+        reach = BROW_REACH
+        left_y = h * 0.22 - key[0] * y_step * 20
+        right_y = h * 0.22 - key[1] * y_step * 20
+        origin = QPointF(w * 0.3 - reach, min(left_y, right_y) - reach)
+        size = QSizeF(w * 0.4 + 2 * reach, abs(left_y - right_y) + 2 * reach)
+        return key, origin, size
+
+    def get_brow_layer(self, w: int, h: int, state: FaceState) -> tuple:
+        """Sobrancelhas rotacionadas, pré-renderizadas por offset/ângulo quantizados.
+
+        Retorna (pixmap, origem) - a origem é relativa à face sem flutuação.
+        """
+        brows, origin, size = self.brow_geometry(w, h, state)
+        dpr = self.devicePixelRatioF()
+        y_step, angle_step = CONFIG["brow_y_step"], CONFIG["brow_angle_step"]
+
+        def render() -> QPixmap:
+            layer = new_layer(size.width(), size.height(), dpr)
+            painter = QPainter(layer)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.translate(-origin)  # Coordenadas da janela
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(self.colors["brow"])
+            for brow_x, brow_y_offset, angle in [
+                (w * 0.3, brows[0] * y_step, brows[2] * angle_step),
+                (w * 0.7, brows[1] * y_step, -brows[3] * angle_step),
+            ]:
+                painter.save()
+                painter.translate(brow_x, h * 0.22 - brow_y_offset * 20)
+                painter.rotate(angle)
+                painter.drawRoundedRect(
+                    int(-BROW_WIDTH / 2), int(-BROW_HEIGHT / 2),
+                    BROW_WIDTH, BROW_HEIGHT, 4, 4
+                )
+                painter.restore()
+            painter.end()
+            return layer
+
+        return self.brow_cache.get((w, h, dpr) + brows, render), origin
+
+    def render_cache_stats(self) -> dict:
+        """Contadores de hit/miss das camadas em cache."""
+        return {
+            "face": self.face_cache.stats(),
+            "brows": self.brow_cache.stats(),
+        }
 
     # -------------------------------------------------------------------------
     # EVENTOS
@@ -776,11 +2942,15 @@ class PipFace(QWidget):
             self.drag_pos = event.globalPosition().toPoint() - self.frameGeometry().topLeft()
 
     def mouseMoveEvent(self, event):
+        self.resume_animation()
         self.mouse_pos = event.position()
 
         if event.buttons() == Qt.MouseButton.LeftButton and self.drag_pos:
             self.move(event.globalPosition().toPoint() - self.drag_pos)
 
+    def enterEvent(self, event):
+        self.resume_animation()
+
     def mouseReleaseEvent(self, event):
         if self.drag_pos:
             self.save_position()
@@ -801,13 +2971,41 @@ class PipFace(QWidget):
         }
 
         if event.key() in key_map:
-            self.set_state(key_map[event.key()])
+            self.set_state(key_map[event.key()], source_priority("local"))
         elif event.key() == Qt.Key.Key_Escape:
             self.quit_app()
         elif event.key() == Qt.Key.Key_H:
             self.emit_particle("heart", 5)
         elif event.key() == Qt.Key.Key_Q:
             self.emit_particle("question", 3)
+        elif event.key() == Qt.Key.Key_D:
+            self.debug_dirty = not self.debug_dirty
+            self.update()
+
+    def changeEvent(self, event):
+        # Minimizar/restaurar muda o FPS na hora
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.update_fps()
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # A janela só fica "exposta" depois do show: acompanhar pelos Expose dela
+        window = self.windowHandle()
+        if window is not None and not self.watching_expose:
+            window.installEventFilter(self)
+            self.watching_expose = True
+        self.update_fps()
+
+    def eventFilter(self, obj, event):
+        # Descoberta/coberta pelo compositor: reavaliar o FPS sem esperar o tick
+        if event.type() == QEvent.Type.Expose:
+            QTimer.singleShot(0, self.update_fps)
+        return super().eventFilter(obj, event)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_fps()
 
     def closeEvent(self, event):
         self.quit_app()
@@ -817,9 +3015,12 @@ class PipFace(QWidget):
 # CLIENTE DE TESTE
 # =============================================================================
 def send_command(cmd: dict, port: int = CONFIG["socket_port"]):
-    """Envia comando para a face via UDP."""
+    """Envia comando para a face via UDP (ou AF_UNIX, se configurado)."""
+    if CONFIG["unix_socket"]:
+        send_unix(encode_command(cmd), CONFIG["unix_socket"], CONFIG["unix_socket_type"] == "stream")
+        return
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.sendto(json.dumps(cmd).encode("utf-8"), ("127.0.0.1", port))
+    sock.sendto(encode_command(cmd), ("127.0.0.1", port))
     sock.close()
 
 
@@ -858,8 +3059,9 @@ if __name__ == "__main__":
 ║    2 = idle                                                  ║
 ║    3 = speaking                                              ║
 ║    H = corações   Q = interrogações   ESC = Sair             ║
+║    D = mostrar regiões repintadas (debug)                    ║
 ╠══════════════════════════════════════════════════════════════╣
-║  FPS: {CONFIG["fps_idle"]} (idle/sleep) | {CONFIG["fps_active"]} (ativo)                          ║
+║  FPS: {CONFIG["fps_min"]}-{CONFIG["fps_max"]} pelo movimento | {CONFIG["fps_hidden"]} com a janela escondida       ║
 ║  Posição da janela é salva automaticamente                   ║
 ╚══════════════════════════════════════════════════════════════╝
 """)
@@ -48,25 +48,26 @@ class MessageHook:
         self.face = get_face()
         self.last_emoji = None
     
-    def process_message(self, message: str) -> None:
+    def process_message(self, message: str, face=None) -> None:
         """
         Processa mensagem e sincroniza face.
         
         Args:
             message: Texto da mensagem
+            face: Controle a usar (ex: get_async_face() em código asyncio); padrão get_face()
         """
+        face = face or self.face
         # Encontrar emoji na mensagem
         for emoji, face_state in EMOJI_TO_FACE.items():
             if emoji in message:
-                self._apply_face_state(face_state, emoji)
+                self._apply_face_state(face_state, emoji, face)
                 return
         
         # Se não encontrou emoji, usar heurística de contexto
-        self._apply_smart_state(message)
+        self._apply_smart_state(message, face)
     
-    def _apply_face_state(self, state: str, emoji: str) -> None:
+    def _apply_face_state(self, state: str, emoji: str, face) -> None:
         """Aplica estado da face com base em emoji."""
-        face = get_face()
         
         if state == "happy":
             face.happy(duration=1.5)
@@ -91,34 +92,34 @@ class MessageHook:
         
         self.last_emoji = emoji
     
-    def _apply_smart_state(self, message: str) -> None:
+    def _apply_smart_state(self, message: str, face) -> None:
         """Aplica estado inteligente baseado no conteúdo."""
         message_lower = message.lower()
         
         # Erros
         if any(word in message_lower for word in ["erro", "falha", "problema", "não", "nope", "failed"]):
-            self.face.error(duration=1.5)
+            face.error(duration=1.5)
         
         # Sucesso/Felicidade
         elif any(word in message_lower for word in ["sucesso", "pronto", "concluído", "feito", "ok", "perfeito", "ótimo"]):
-            self.face.happy(duration=1.5)
+            face.happy(duration=1.5)
         
         # Trabalhando/Processando
         elif any(word in message_lower for word in ["processando", "aguarde", "carregando", "executando", "rodando"]):
-            self.face.working(duration=2)
+            face.working(duration=2)
         
         # Pensando
         elif any(word in message_lower for word in ["deixa", "vou", "verificar", "analisando", "testando"]):
-            self.face.thinking(duration=2)
+            face.thinking(duration=2)
         
         # Confuso
         elif any(word in message_lower for word in ["confuso", "não entendi", "?", "o quê"]):
-            self.face.send(state="confused")
-            self.face._schedule_idle(1.5)
+            face.send(state="confused")
+            face._schedule_idle(1.5)
         
         # Default: speaking
         else:
-            self.face.speaking(duration=1.5)
+            face.speaking(duration=1.5)
 
 
 # Instância global
@@ -131,10 +132,10 @@ def get_hook() -> MessageHook:
         _hook = MessageHook()
     return _hook
 
-def process_message(message: str) -> None:
+def process_message(message: str, face=None) -> None:
     """Processa uma mensagem e sincroniza a face."""
     hook = get_hook()
-    hook.process_message(message)
+    hook.process_message(message, face)
 
 
 if __name__ == "__main__":
@@ -14,7 +14,7 @@ Uso:
 
 import logging
 from typing import Optional
-from pip_face_integration import process_message_with_emoji, get_face
+from pip_face_integration import process_message_with_emoji, get_face, get_async_face
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +30,7 @@ async def send_message(message: str, channel: str = "telegram", target: str = "1
     try:
         # Sincronizar face ANTES de enviar
         logger.info(f"🎭 Sincronizando face: {message[:50]}...")
-        process_message_with_emoji(message)
+        process_message_with_emoji(message, get_async_face())  # Sem bloquear o loop
         
         # Importar função de envio do Clawdbot
         # (você vai adaptar isso conforme seu setup)
@@ -42,7 +42,7 @@ async def send_message(message: str, channel: str = "telegram", target: str = "1
     
     except Exception as e:
         logger.error(f"Erro ao enviar: {e}")
-        get_face().error(duration=1.5)
+        get_async_face().error(duration=1.5)
         return False
 
 
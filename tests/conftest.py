@@ -0,0 +1,6 @@
+import os
+import sys
+
+# A face importa PyQt6: sem display, usar a plataforma offscreen
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
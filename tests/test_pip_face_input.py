@@ -0,0 +1,140 @@
+"""Entradas vindas da rede que não podem derrubar a face."""
+
+import json
+import math
+
+from PyQt6.QtWidgets import QApplication
+
+from pip_face_v04 import (
+    CONFIG, AmplitudeStream, ParticleSystem, SequenceFilter, SubscriptionHub, parse_command,
+)
+
+app = QApplication.instance() or QApplication([])
+
+
+def make_stream() -> AmplitudeStream:
+    return AmplitudeStream(size=64, delay=0.0, timeout=1.0)
+
+
+def push_datagram(stream: AmplitudeStream, cmd: dict) -> list:
+    commands = []
+    parse_command(json.dumps(cmd).encode(), commands, amplitude=stream)
+    return commands
+
+
+def test_amplitude_nan_sample_is_rejected():
+    stream = make_stream()
+    assert not stream.push(0.0, 100, [0.2, math.nan])
+    assert stream.rejected == 1
+    assert stream.sample(0.0) is None
+
+
+def test_amplitude_non_finite_timestamp_and_rate_are_rejected():
+    stream = make_stream()
+    assert not stream.push(math.nan, 100, [0.5])
+    assert not stream.push(math.inf, 100, [0.5])
+    assert not stream.push(0.0, math.inf, [0.5])
+    assert not stream.push(0.0, 0, [0.5])
+    assert stream.rejected == 4
+    assert len(stream.samples) == 0
+
+
+def test_amplitude_samples_are_clamped():
+    stream = make_stream()
+    assert stream.push(0.0, 100, [-3.0, 7.5])
+    assert [value for _, value in stream.samples] == [0.0, 1.0]
+
+
+def test_amplitude_datagrams_with_nan_inf_or_huge_rate_are_dropped():
+    stream = make_stream()
+    # json aceita NaN/Infinity; 1e999 vira inf e int(inf) levanta OverflowError
+    for cmd in (
+        {"amplitude_samples": [float("nan")], "t": 1.0, "rate": 100},
+        {"amplitude_samples": [0.5], "t": float("nan"), "rate": 100},
+        {"amplitude_samples": [0.5], "t": float("inf"), "rate": 100},
+        {"amplitude_samples": [0.5], "t": 1.0, "rate": 1e999},
+        {"amplitude_samples": [0.5], "t": 1.0, "rate": 10 ** 400},
+    ):
+        assert push_datagram(stream, cmd) == []
+    assert stream.received == 0
+    assert not stream.active
+
+
+def make_hub():
+    hub = SubscriptionHub(0.1)
+    hub.replies = []
+    hub.send = lambda target, msg: hub.replies.append(msg)
+    return hub
+
+
+def test_subscription_non_finite_or_invalid_lease_falls_back_to_default():
+    hub = make_hub()
+    for i, lease in enumerate((float("nan"), float("inf"), -5, 0, "soon", None)):
+        hub.subscribe(("sock", i), ["state"], lease)
+        assert hub.replies[-1]["lease"] == CONFIG["subscription_lease"]
+    hub.schedule()  # Não pode levantar com as leases registradas
+    assert len(hub.subscribers) == 6
+
+
+def test_subscription_lease_is_capped():
+    hub = make_hub()
+    hub.subscribe(("sock", 0), ["state"], 1e9)
+    assert hub.replies[-1]["lease"] == CONFIG["subscription_lease_max"]
+
+
+def test_custom_particle_kinds_are_bounded():
+    particles = ParticleSystem(capacity=64)
+    particles.emit(0, 0, "heart", 1)
+    for i in range(300):
+        particles.kind_of(f"name{i}")  # Sem partículas vivas: tipos livres reaproveitáveis
+    particles.emit(0, 0, "x" * 20000, 1)
+    assert len(particles.kinds) <= len(ParticleSystem.SYMBOLS) + CONFIG["particle_custom_kinds"]
+    assert max(len(text) for text, _ in particles.kinds) <= CONFIG["particle_text_max"]
+
+    particles.atlas.ensure(particles.kinds, {16}, 1.0)
+    assert particles.atlas.pixmap.width() < 1000
+
+
+def test_custom_particle_kind_in_use_is_not_reused():
+    particles = ParticleSystem(capacity=256)
+    for i in range(CONFIG["particle_custom_kinds"]):
+        particles.emit(0, 0, f"live{i}", 1)
+    particles.emit(0, 0, "late", 1)
+    assert "late" not in particles._kind_index
+    assert particles.dropped == 1
+    assert len(particles) == CONFIG["particle_custom_kinds"]
+
+
+def test_reasserting_current_state_does_not_wake_the_face():
+    from pip_face_v04 import PipFace
+
+    CONFIG["socket_port"] = 0
+    face = PipFace()
+    try:
+        face.apply_command({"state": "sleeping"})
+        face.last_activity_time = 0.0
+        face.apply_command({"state": "sleeping", "source": "bot"})
+        assert face.state_name == "sleeping"
+        assert face.last_activity_time == 0.0
+    finally:
+        face.socket_server.stop()
+
+
+def test_reordered_sequence_is_applied_once():
+    sequences = SequenceFilter(size=4)
+    client = (None, "client")
+    assert not sequences.seen(client, 10)
+    assert not sequences.seen(client, 12)
+    assert not sequences.seen(client, 11)  # Chegou depois do 12: ainda não visto
+    assert sequences.seen(client, 11)
+    assert sequences.seen(client, 12)
+    assert sequences.duplicates == 2
+
+
+def test_sequence_far_behind_is_a_new_client():
+    sequences = SequenceFilter(size=4)
+    client = (None, "client")
+    assert not sequences.seen(client, 5000)
+    assert sequences.seen(client, 5000 - sequences.window)
+    assert not sequences.seen(client, 1)
+    assert not sequences.seen(client, 2)